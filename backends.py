@@ -0,0 +1,293 @@
+"""
+Inference backends untuk YOLO BISINDO Predictor
+Satu kontrak predict(batch) -> probs untuk PyTorch (ultralytics) dan TFLite
+"""
+
+import json
+import os
+import threading
+import zipfile
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import METRICS
+from utils import ConfigManager, ImageUtils
+
+DEFAULT_IMGSZ = 128
+DEFAULT_MODEL_KEY = "detection"
+TFLITE_FALLBACK_KEY = "tflite_float16"
+
+
+def preprocess_image(image, imgsz):
+    """Center crop persegi lalu resize ke imgsz, return float32 HWC (0..1)"""
+    return ImageUtils.fit_square(image, imgsz).astype(np.float32) / 255.0
+
+
+def top_k(probs, k=3):
+    """Index kelas dengan probabilitas tertinggi, urut menurun"""
+    k = min(k, len(probs))
+    idx = np.argpartition(probs, -k)[-k:]
+    return idx[np.argsort(probs[idx])[::-1]].tolist()
+
+
+def read_tflite_metadata(model_path):
+    """Baca metadata.json yang di-embed ultralytics di file .tflite"""
+    try:
+        with zipfile.ZipFile(model_path) as archive:
+            return json.loads(archive.read("metadata.json"))
+    except (zipfile.BadZipFile, KeyError, ValueError):
+        return {}
+
+
+def import_tflite_interpreter():
+    """Cari TFLite Interpreter: tflite_runtime, ai_edge_litert, lalu tensorflow"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        import tensorflow as tf
+        return tf.lite.Interpreter
+    except ImportError:
+        raise ImportError("TFLite interpreter tidak ditemukan, install tflite-runtime")
+
+
+class InferenceBackend:
+    """Base backend: predict(batch) return probabilitas (N, num_classes)"""
+
+    name = "base"
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.names = {}
+        self.imgsz = DEFAULT_IMGSZ
+        # Interpreter / predictor tidak thread-safe, satu forward pass pada satu waktu
+        self._lock = threading.Lock()
+
+    @property
+    def num_classes(self):
+        return len(self.names)
+
+    @property
+    def version(self):
+        """Identitas model: nama file, ukuran dan mtime"""
+        stat = os.stat(self.model_path)
+        return f"{os.path.basename(self.model_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+    def predict(self, batch):
+        """Run inference pada list gambar RGB uint8 (HWC), return float32 (N, C)"""
+        raise NotImplementedError
+
+    def predict_one(self, image):
+        """Predict satu gambar, return vector probabilitas (C,)"""
+        return self.predict([image])[0]
+
+    def _empty(self):
+        return np.zeros((0, self.num_classes), dtype=np.float32)
+
+
+class TorchBackend(InferenceBackend):
+    """Backend PyTorch via ultralytics YOLO
+
+    model: objek YOLO yang sudah di-load (mis. weights bersama dari shared_weights.py)
+    """
+
+    name = "pytorch"
+
+    def __init__(self, model_path, device="cpu", num_threads=0, model=None):
+        super().__init__(model_path)
+        import torch
+        from ultralytics import YOLO
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.device = device
+        self.model = model if model is not None else YOLO(model_path)
+        self.names = dict(self.model.names)
+        imgsz = self.model.overrides.get("imgsz") or DEFAULT_IMGSZ
+        self.imgsz = int(imgsz[0] if isinstance(imgsz, (list, tuple)) else imgsz)
+
+    def predict(self, batch):
+        if len(batch) == 0:
+            return self._empty()
+
+        # ultralytics menganggap numpy array sebagai BGR
+        sources = [np.ascontiguousarray(image[..., ::-1]) for image in batch]
+        with self._lock:
+            results = self.model.predict(
+                source=sources, imgsz=self.imgsz, device=self.device, verbose=False
+            )
+        # Preprocess terjadi di dalam ultralytics, ambil dari speed (ms per gambar)
+        speed = results[0].speed
+        METRICS.observe("preprocess", speed.get("preprocess", 0.0) * len(batch) / 1000)
+        METRICS.observe("inference", (speed.get("inference", 0.0) + speed.get("postprocess", 0.0)) * len(batch) / 1000)
+        return np.stack([r.probs.data.cpu().numpy() for r in results]).astype(np.float32)
+
+
+class TFLiteBackend(InferenceBackend):
+    """Backend TFLite (float32/float16/INT8) via interpreter lokal, CPU only"""
+
+    name = "tflite"
+
+    def __init__(self, model_path, num_threads=0):
+        super().__init__(model_path)
+        Interpreter = import_tflite_interpreter()
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads or None)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = int(self._input["shape"][0])
+        self._fixed_batch = False
+        # Export litert-torch (INT8) memakai layout NCHW, export TF memakai NHWC
+        self._channels_first = int(self._input["shape"][1]) == 3 and int(self._input["shape"][-1]) != 3
+        self.imgsz = int(self._input["shape"][2 if self._channels_first else 1])
+
+        metadata = read_tflite_metadata(model_path)
+        names = metadata.get("names") or {}
+        num_classes = int(self._output["shape"][-1])
+        self.names = {int(k): v for k, v in names.items()} or {i: str(i) for i in range(num_classes)}
+
+    def predict(self, batch):
+        if len(batch) == 0:
+            return self._empty()
+
+        with METRICS.time("preprocess"):
+            inputs = np.stack([preprocess_image(image, self.imgsz) for image in batch])
+            if self._channels_first:
+                inputs = np.ascontiguousarray(inputs.transpose(0, 3, 1, 2))
+            inputs = self._quantize(inputs)
+        with self._lock, METRICS.time("inference"):
+            if not self._fixed_batch:
+                outputs = self._invoke(inputs)
+                if outputs.shape[0] == inputs.shape[0]:
+                    return self._dequantize(outputs)
+                # Graph dengan batch statis (export litert-torch) mengabaikan resize, jalankan per gambar
+                self._fixed_batch = True
+            outputs = np.concatenate([self._invoke(inputs[i:i + 1]) for i in range(inputs.shape[0])])
+        return self._dequantize(outputs)
+
+    def _invoke(self, inputs):
+        if inputs.shape[0] != self._batch:
+            self.interpreter.resize_tensor_input(self._input["index"], list(inputs.shape))
+            self.interpreter.allocate_tensors()
+            self._batch = inputs.shape[0]
+        self.interpreter.set_tensor(self._input["index"], inputs)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output["index"]).copy()
+
+    def _quantize(self, inputs):
+        """Model full-integer (INT8) butuh input terkuantisasi: q = x / scale + zero_point"""
+        dtype = self._input["dtype"]
+        if not np.issubdtype(dtype, np.integer):
+            return inputs
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(inputs / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, outputs):
+        if not np.issubdtype(outputs.dtype, np.integer):
+            return outputs.astype(np.float32)
+        scale, zero_point = self._output["quantization"]
+        return (outputs.astype(np.float32) - zero_point) * scale
+
+
+def resolve_device(performance):
+    """Tentukan device dari performance.inference_device ('auto', 'cpu', 'cuda:0', 'tflite')"""
+    device = performance.get("inference_device", "auto")
+    # 'tflite' tidak berarti apa-apa untuk model .pt yang di-load eksplisit, perlakukan seperti 'auto'
+    if device not in ("auto", "tflite"):
+        return device
+
+    if performance.get("use_gpu", False):
+        try:
+            import torch
+            if torch.cuda.is_available():
+                return "cuda:0"
+        except ImportError:
+            pass
+    return "cpu"
+
+
+def resolve_model_path(model_key=None, config=None):
+    """Path file model yang akan di-load create_backend() untuk config ini"""
+    performance = (config or {}).get("performance", {})
+    model_key = model_key or performance.get("model", DEFAULT_MODEL_KEY)
+    model_path = ConfigManager.get_model_path(model_key, config) or "best.pt"
+    if performance.get("inference_device") == "tflite" and not model_path.endswith(".tflite"):
+        model_path = ConfigManager.get_model_path(TFLITE_FALLBACK_KEY, config)
+    return model_path
+
+
+def create_backend(model_key=None, config=None, model_path=None):
+    """Buat backend dari config.json: performance.model + performance.inference_device
+
+    model_path menimpa path dari config (mis. file weights baru hasil retraining)
+    """
+    if config is None:
+        config = ConfigManager.load_config() or {}
+
+    performance = config.get("performance", {})
+    num_threads = int(performance.get("num_threads", 0))
+    model_path = model_path or resolve_model_path(model_key, config)
+
+    if not model_path or not os.path.exists(model_path):
+        raise FileNotFoundError(f"{model_path} tidak ditemukan!")
+
+    if model_path.endswith(".tflite"):
+        return TFLiteBackend(model_path, num_threads=num_threads)
+    # resolve_device() mengimpor torch, jadi hanya dipanggil untuk backend PyTorch
+    return TorchBackend(model_path, device=resolve_device(performance), num_threads=num_threads)
+
+
+def warmup(backend, iterations=1):
+    """Inference dummy supaya inisialisasi lazy (predictor, delegate, cv2) tidak kena request pertama"""
+    dummy = np.zeros((backend.imgsz, backend.imgsz, 3), dtype=np.uint8)
+    for _ in range(max(0, int(iterations))):
+        backend.predict([dummy])
+    return backend
+
+
+def load_backend_async(model_key=None, config=None):
+    """create_backend + warmup di background thread, return Future berisi backend
+
+    Import torch / ultralytics dan load model terjadi di thread ini, jadi UI
+    atau server bisa mulai lebih dulu dan baru menunggu saat model dibutuhkan
+    """
+    if config is None:
+        config = ConfigManager.load_config() or {}
+    iterations = config.get("performance", {}).get("warmup_iterations", 1)
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(warmup(create_backend(model_key, config), iterations))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="model-loader", daemon=True).start()
+    return future
+
+
+# Export backends
+__all__ = [
+    'InferenceBackend',
+    'TorchBackend',
+    'TFLiteBackend',
+    'create_backend',
+    'import_tflite_interpreter',
+    'load_backend_async',
+    'preprocess_image',
+    'resolve_device',
+    'resolve_model_path',
+    'top_k',
+    'warmup'
+]
@@ -0,0 +1,164 @@
+"""
+Batch inference helpers untuk YOLO BISINDO Predictor
+Decode gambar secara paralel lalu inference per batch (performance.batch_size),
+plus micro-batching lintas session (performance.micro_batch_size)
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from ingest import decode_image
+
+
+def _safe_decode(data, min_side=None):
+    try:
+        return decode_image(data, min_side), None
+    except Exception as e:
+        return None, str(e)
+
+
+def decode_images(blobs, max_workers=None, min_side=None):
+    """Decode banyak gambar paralel (OpenCV / PIL melepas GIL saat decode), urutan tetap
+
+    blobs: bytes atau buffer (BytesIO / UploadedFile) yang diterima decode_image
+
+    Return list of (array, error) dengan error None kalau decode berhasil
+    """
+    if len(blobs) <= 1:
+        return [_safe_decode(data, min_side) for data in blobs]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda data: _safe_decode(data, min_side), blobs))
+
+
+def iter_batches(items, batch_size):
+    """Bagi list / generator menjadi batch berukuran batch_size (lazy)"""
+    batch_size = max(1, int(batch_size))
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def predict_in_batches(backend, images, batch_size):
+    """Satu forward pass per batch, yield (probs, elapsed_detik) per batch"""
+    for batch in iter_batches(images, batch_size):
+        start = time.perf_counter()
+        probs = backend.predict(batch)
+        yield probs, time.perf_counter() - start
+
+
+class MicroBatcher:
+    """Gabungkan request dari banyak session / thread menjadi satu forward pass
+
+    Kontrak sama dengan backend (predict / predict_one), atribut lain didelegasikan
+    """
+
+    def __init__(self, backend, max_batch_size=16, max_wait_ms=5):
+        self.backend = backend
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, backend, config):
+        """Bungkus backend kalau performance.micro_batch_size > 1, selain itu return backend"""
+        performance = (config or {}).get("performance", {})
+        max_batch_size = int(performance.get("micro_batch_size", 1))
+        if max_batch_size <= 1:
+            return backend
+        return cls(backend, max_batch_size, performance.get("micro_batch_wait_ms", 5))
+
+    def __getattr__(self, name):
+        # Delegasi ke backend (names, imgsz, model_path, version, ...)
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def submit(self, image):
+        """Antrikan satu gambar, return Future berisi vector probabilitas"""
+        future = Future()
+        self._queue.put((image, future))
+        self._ensure_running()
+        return future
+
+    def predict(self, batch):
+        futures = [self.submit(image) for image in batch]
+        if not futures:
+            return self.backend.predict([])
+        return np.stack([future.result() for future in futures])
+
+    def predict_one(self, image):
+        return self.submit(image).result()
+
+    def stats(self):
+        """Statistik batching: jumlah batch, item dan rata-rata ukuran batch"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "queue_depth": self._queue.qsize(),
+        }
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        """Tunggu request pertama, lalu kumpulkan sampai max_batch_size atau max_wait"""
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    items.append(self._queue.get(timeout=remaining))
+                else:
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return [(image, future) for image, future in items if future.set_running_or_notify_cancel()]
+
+    def _run(self):
+        # Thread ini tidak boleh mati dan setiap future harus selesai, kalau tidak caller menunggu selamanya
+        while True:
+            items = []
+            try:
+                items = self._collect()
+                if not items:
+                    continue
+                probs = self.backend.predict([image for image, _ in items])
+                if len(probs) != len(items):
+                    raise ValueError(f"Backend mengembalikan {len(probs)} hasil untuk {len(items)} gambar")
+                for (_, future), row in zip(items, probs):
+                    future.set_result(row)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+            self.batches += bool(items)
+            self.items += len(items)
+
+
+# Export helpers
+__all__ = [
+    'MicroBatcher',
+    'decode_image',
+    'decode_images',
+    'iter_batches',
+    'predict_in_batches'
+]
@@ -0,0 +1,238 @@
+"""
+Benchmark suite untuk YOLO BISINDO Predictor
+Sweep backend x batch size x resolusi input x jumlah thread, laporkan latency
+p50/p95/p99, images/sec dan peak RSS, simpan JSON dan bandingkan dengan baseline
+
+Contoh:
+    python benchmark.py --models detection,tflite_float16 --batch-sizes 1,8 --threads 1,4
+    python benchmark.py --images dataset/val/A --output bench.json
+    python benchmark.py --baseline bench.json --tolerance 10
+"""
+
+import argparse
+import copy
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from backends import create_backend
+from ingest import decode_image
+from utils import ConfigManager, ValidationUtils
+
+
+def peak_rss_mb():
+    """Peak resident memory proses ini dalam MB (None kalau tidak tersedia)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux: KB, macOS: bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def parse_list(value, cast=str):
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def parse_resolution(value):
+    """'480x640' -> (480, 640) sebagai (height, width)"""
+    height, width = value.lower().split("x")
+    return int(height), int(width)
+
+
+def load_images(params):
+    """Gambar dari direktori (full decode) atau synthetic dengan seed tetap"""
+    if params["images"]:
+        images = []
+        for name in sorted(os.listdir(params["images"])):
+            path = os.path.join(params["images"], name)
+            if ValidationUtils.is_valid_image_file(path):
+                with open(path, "rb") as f:
+                    images.append(decode_image(f.read()))
+            if len(images) >= params["num_images"]:
+                break
+        if not images:
+            raise ValueError(f"Tidak ada gambar di {params['images']}")
+        return images
+
+    height, width = params["resolution"]
+    rng = np.random.default_rng(params["seed"])
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(params["num_images"])]
+
+
+def run_config(params):
+    """Jalankan satu konfigurasi benchmark, return dict hasil"""
+    config = copy.deepcopy(ConfigManager.load_config() or {})
+    performance = config.setdefault("performance", {})
+    performance["num_threads"] = params["threads"]
+
+    images = load_images(params)
+
+    start = time.perf_counter()
+    backend = create_backend(params["model"], config)
+    load_time = time.perf_counter() - start
+
+    batch_size = params["batch_size"]
+    batches = itertools.cycle(
+        [images[(i + j) % len(images)] for j in range(batch_size)] for i in range(len(images))
+    )
+
+    for _ in range(params["warmup"]):
+        backend.predict(next(batches))
+
+    latencies = []
+    total_start = time.perf_counter()
+    for _ in range(params["iterations"]):
+        batch = next(batches)
+        start = time.perf_counter()
+        backend.predict(batch)
+        latencies.append(time.perf_counter() - start)
+    total_time = time.perf_counter() - total_start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "id": config_id(params),
+        "model": params["model"],
+        "backend": backend.name,
+        "batch_size": batch_size,
+        "resolution": "dir" if params["images"] else "x".join(map(str, params["resolution"])),
+        "threads": params["threads"],
+        "iterations": params["iterations"],
+        "load_time_s": round(load_time, 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+        "images_per_sec": round(params["iterations"] * batch_size / total_time, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def config_id(params):
+    resolution = "dir" if params["images"] else "x".join(map(str, params["resolution"]))
+    return f"{params['model']}|bs{params['batch_size']}|{resolution}|t{params['threads']}"
+
+
+def run_isolated(params):
+    """Satu proses per konfigurasi supaya peak RSS dan state thread tidak tercampur"""
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(run_config, (params,))
+
+
+def compare(results, baseline, tolerance):
+    """Bandingkan dengan baseline, return list regresi (p50 naik / throughput turun > tolerance%)"""
+    previous = {item["id"]: item for item in baseline.get("results", [])}
+    regressions = []
+    for item in results:
+        old = previous.get(item["id"])
+        if not old:
+            continue
+        latency_change = (item["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+        throughput_change = (item["images_per_sec"] - old["images_per_sec"]) / old["images_per_sec"] * 100
+        item["p50_change_pct"] = round(latency_change, 2)
+        item["throughput_change_pct"] = round(throughput_change, 2)
+        if latency_change > tolerance or throughput_change < -tolerance:
+            regressions.append(item)
+    return regressions
+
+
+def print_table(results):
+    header = f"{'config':<42} {'p50':>9} {'p95':>9} {'p99':>9} {'img/s':>9} {'RSS MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for item in results:
+        rss = f"{item['peak_rss_mb']:.0f}" if item["peak_rss_mb"] else "-"
+        print(f"{item['id']:<42} {item['p50_ms']:>9.2f} {item['p95_ms']:>9.2f} "
+              f"{item['p99_ms']:>9.2f} {item['images_per_sec']:>9.1f} {rss:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO BISINDO benchmark")
+    parser.add_argument("--models", default="detection,tflite_float16", help="Key model di config.json")
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--resolutions", default="480x640", help="Resolusi gambar synthetic, HxW")
+    parser.add_argument("--threads", default="0", help="Thread per backend (0 = default library)")
+    parser.add_argument("--images", default=None, help="Direktori gambar (ganti synthetic)")
+    parser.add_argument("--num-images", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Tulis hasil JSON ke file ini")
+    parser.add_argument("--baseline", default=None, help="JSON baseline untuk deteksi regresi")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Toleransi regresi dalam persen")
+    parser.add_argument("--no-isolate", action="store_true", help="Jalankan semua konfigurasi di satu proses")
+    args = parser.parse_args()
+
+    resolutions = [None] if args.images else parse_list(args.resolutions, parse_resolution)
+    sweep = itertools.product(
+        parse_list(args.models), parse_list(args.batch_sizes, int), resolutions, parse_list(args.threads, int)
+    )
+
+    results = []
+    for model, batch_size, resolution, threads in sweep:
+        params = {
+            "model": model,
+            "batch_size": batch_size,
+            "resolution": resolution,
+            "threads": threads,
+            "images": args.images,
+            "num_images": args.num_images,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        }
+        print(f"▶️ {config_id(params)}", flush=True)
+        try:
+            results.append(run_config(params) if args.no_isolate else run_isolated(params))
+        except Exception as e:
+            print(f"❌ {config_id(params)} gagal: {e}")
+
+    print()
+    print_table(results)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report["regressions"] = [item["id"] for item in regressions]
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} regresi (> {args.tolerance}%):")
+            for item in regressions:
+                print(f"   {item['id']}: p50 {item['p50_change_pct']:+.1f}%, "
+                      f"throughput {item['throughput_change_pct']:+.1f}%")
+            exit_code = 1
+        else:
+            print("\n✅ Tidak ada regresi dibanding baseline")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Hasil ditulis ke {args.output}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
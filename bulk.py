@@ -0,0 +1,294 @@
+"""
+Bulk inference multi-core untuk YOLO BISINDO Predictor
+Input dibagi per batch ke N worker process, masing-masing dengan model sendiri dan
+jumlah thread tetap (tanpa oversubscription), hasil digabung sesuai urutan input.
+Dengan --shared-weights, weights .pt di-load sekali dan semua worker memakai mapping
+yang sama (memory per worker tidak lagi naik dengan ukuran model)
+
+Contoh:
+    python bulk.py --input dataset/test --output predictions.csv
+    python bulk.py --input dataset/test --workers 8 --threads 2
+    python bulk.py --input dataset/test --workers 16 --shared-weights
+"""
+
+import argparse
+import copy
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from backends import resolve_device, resolve_model_path, top_k
+from batching import iter_batches
+from ingest import decode_image
+from shared_weights import memory_usage, publish_weights, release_weights
+from utils import ConfigManager, ValidationUtils
+
+# Thread pool library numerik dibaca saat import. Worker spawn sudah mengimpor numpy saat
+# unpickle initializer (import modul ini), jadi nilainya harus ada di environment yang
+# diwarisi dari parent saat process dibuat, bukan di-set di initializer
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+_worker_backend = None
+_worker_load_s = None
+
+
+def resolve_workers(performance, workers=None, threads=None):
+    """(workers, threads_per_worker) dari argumen atau performance.bulk_*; 0 = otomatis"""
+    threads = int(threads or performance.get("bulk_threads_per_worker", 1) or 1)
+    workers = int(workers or performance.get("bulk_workers", 0) or 0)
+    if workers <= 0:
+        workers = max(1, (os.cpu_count() or 1) // threads)
+    return workers, threads
+
+
+@contextmanager
+def worker_environment(threads):
+    """Set THREAD_ENV_VARS selama process worker dibuat, lalu kembalikan nilai parent"""
+    previous = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _init_worker(model_key, config, threads, shared=None):
+    """Initializer worker: load backend sekali per process (thread torch = threads)
+
+    shared: handle dari publish_weights(), weights di-mmap alih-alih di-load dari best.pt
+    """
+    global _worker_backend, _worker_load_s
+    start = time.perf_counter()
+
+    from backends import TorchBackend, create_backend
+
+    config = copy.deepcopy(config)
+    config.setdefault("performance", {})["num_threads"] = threads
+    if shared is not None:
+        from shared_weights import load_shared_model
+        _worker_backend = TorchBackend(shared["model_path"], num_threads=threads, model=load_shared_model(shared))
+    else:
+        _worker_backend = create_backend(model_key, config)
+    _worker_load_s = time.perf_counter() - start
+
+
+def _worker_info():
+    backend = _worker_backend
+    return {"name": backend.name, "model_path": backend.model_path, "names": backend.names, "imgsz": backend.imgsz}
+
+
+def _load(item, min_side):
+    """Item berupa path file atau bytes gambar"""
+    if isinstance(item, str):
+        with open(item, "rb") as f:
+            item = f.read()
+    return decode_image(item, min_side)
+
+
+def _worker_stats():
+    return {"pid": os.getpid(), "load_s": _worker_load_s, **memory_usage()}
+
+
+def _predict_chunk(items):
+    """Decode + predict satu batch di worker, return (list (probs, error) sesuai urutan, stats worker)"""
+    backend = _worker_backend
+    results = [None] * len(items)
+    images = []
+    positions = []
+    for position, item in enumerate(items):
+        try:
+            images.append(_load(item, backend.imgsz))
+            positions.append(position)
+        except Exception as e:
+            results[position] = (None, str(e))
+
+    if images:
+        probs = backend.predict(images)
+        for position, row in zip(positions, probs):
+            results[position] = (row, None)
+    # Memory diukur setelah inference (buffer runtime sudah teralokasi)
+    return results, _worker_stats()
+
+
+class BulkPredictor:
+    """Process pool dengan satu model per worker; predict() menjaga urutan input
+
+    shared_weights: weights .pt di-load sekali ke storage bersama dan di-mmap semua worker
+    (default performance.bulk_shared_weights; diabaikan untuk TFLite / GPU)
+    """
+
+    def __init__(self, model_key=None, config=None, workers=None, threads=None, batch_size=None,
+                 shared_weights=None):
+        self.config = config if config is not None else (ConfigManager.load_config() or {})
+        performance = self.config.get("performance", {})
+        self.model_key = model_key
+        self.workers, self.threads = resolve_workers(performance, workers, threads)
+        self.batch_size = int(batch_size or performance.get("batch_size", 8))
+        if shared_weights is None:
+            shared_weights = performance.get("bulk_shared_weights", False)
+        self.shared_weights = bool(shared_weights)
+        self.shared = None
+        self.worker_stats = {}
+        self._pool = None
+
+    def start(self):
+        if self._pool is None:
+            if self.shared_weights and self.shared is None and self._can_share():
+                self.shared = publish_weights(resolve_model_path(self.model_key, self.config))
+            # spawn: worker tidak mewarisi state torch / thread pool dari parent
+            context = multiprocessing.get_context("spawn")
+            with worker_environment(self.threads):
+                self._pool = context.Pool(
+                    self.workers, initializer=_init_worker,
+                    initargs=(self.model_key, self.config, self.threads, self.shared),
+                )
+        return self
+
+    def _can_share(self):
+        performance = self.config.get("performance", {})
+        return (resolve_model_path(self.model_key, self.config).endswith(".pt")
+                and resolve_device(performance) == "cpu")
+
+    def info(self):
+        """Info model dari salah satu worker (nama kelas, backend, imgsz)"""
+        self.start()
+        return self._pool.apply(_worker_info)
+
+    def predict(self, items):
+        """Generator (probs atau None, error) per item, urutan sama dengan input
+
+        items: iterable path file atau bytes gambar, dibaca dan di-decode di worker
+        """
+        self.start()
+        for results, stats in self._pool.imap(_predict_chunk, iter_batches(items, self.batch_size)):
+            self.worker_stats[stats["pid"]] = stats
+            yield from results
+
+    def memory_report(self):
+        """Waktu load dan memory per worker (dari batch terakhir tiap worker) + total PSS"""
+        stats = list(self.worker_stats.values())
+        if not stats:
+            return None
+
+        def column(key):
+            return np.array([item[key] for item in stats if item[key] is not None], dtype=np.float64)
+
+        rss, pss, load = column("rss_mb"), column("pss_mb"), column("load_s")
+        return {
+            "workers": len(stats),
+            "shared_weights": self.shared is not None,
+            "publish_s": self.shared["publish_s"] if self.shared else None,
+            "load_s_p50": float(np.median(load)) if load.size else None,
+            "load_s_max": float(load.max()) if load.size else None,
+            "rss_mb_per_worker": float(rss.mean()) if rss.size else None,
+            "pss_mb_per_worker": float(pss.mean()) if pss.size else None,
+            # Jumlah PSS = memory fisik sebenarnya semua worker (page bersama dihitung sekali)
+            "pss_mb_total": float(pss.sum()) if pss.size else None,
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        release_weights(self.shared)
+        self.shared = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def list_images(root):
+    """Semua file gambar di bawah root (rekursif), urut"""
+    paths = []
+    for folder, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(folder, name)
+            if ValidationUtils.is_valid_image_file(path):
+                paths.append(path)
+    return sorted(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO BISINDO bulk inference (multi-process)")
+    parser.add_argument("--input", required=True, help="Folder gambar (rekursif)")
+    parser.add_argument("--output", default="predictions.csv", help="File CSV hasil")
+    parser.add_argument("--model", default=None, help="Key model di config.json (default: performance.model)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah process (default: performance.bulk_workers)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Thread per process (default: performance.bulk_threads_per_worker)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--shared-weights", action=argparse.BooleanOptionalAction, default=None,
+                        help="Load weights sekali, semua worker memakai mapping yang sama; "
+                             "--no-shared-weights untuk mematikan (default: performance.bulk_shared_weights)")
+    args = parser.parse_args()
+
+    paths = list_images(args.input)
+    if not paths:
+        print(f"❌ Tidak ada gambar di {args.input}")
+        return 1
+
+    failed = 0
+    start = time.perf_counter()
+    with BulkPredictor(args.model, None, args.workers, args.threads, args.batch_size,
+                       args.shared_weights) as predictor:
+        info = predictor.info()
+        names = info["names"]
+        shared = f" | shared weights {predictor.shared['size_mb']:.1f} MB" if predictor.shared else ""
+        print(f"🚀 {len(paths)} gambar | {info['model_path']} ({info['name']}) | {predictor.workers} worker "
+              f"x {predictor.threads} thread | batch {predictor.batch_size}{shared}")
+        print(f"⏱️ Worker pertama siap dalam {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["path", "label", "confidence", "top3", "error"])
+            for path, (probs, error) in zip(paths, predictor.predict(paths)):
+                if error is not None:
+                    failed += 1
+                    writer.writerow([path, "", "", "", error])
+                    continue
+                top = top_k(probs, 3)
+                writer.writerow([
+                    path, names[top[0]], f"{probs[top[0]]:.6f}",
+                    " ".join(f"{names[idx]}:{probs[idx]:.4f}" for idx in top), "",
+                ])
+        elapsed = time.perf_counter() - start
+        report = predictor.memory_report()
+
+    print(f"✅ {len(paths) - failed} gambar dalam {elapsed:.1f}s ({len(paths) / elapsed:.1f} img/s)"
+          f"{f', {failed} gagal' if failed else ''}")
+    print(f"📄 Hasil ditulis ke {args.output}")
+    if report:
+        publish = f"publish weights {report['publish_s']:.2f}s, " if report["shared_weights"] else ""
+        print(f"⏱️ Startup: {publish}load worker p50 {report['load_s_p50']:.2f}s / max {report['load_s_max']:.2f}s")
+        if report["pss_mb_per_worker"] is not None:
+            print(f"🧠 Per worker: RSS {report['rss_mb_per_worker']:.0f} MB, PSS {report['pss_mb_per_worker']:.0f} MB "
+                  f"| total PSS {report['workers']} worker: {report['pss_mb_total']:.0f} MB")
+        else:
+            print(f"🧠 Per worker: RSS {report['rss_mb_per_worker']:.0f} MB")
+    return 0
+
+
+# Export bulk
+__all__ = [
+    'BulkPredictor',
+    'list_images',
+    'resolve_workers',
+    'worker_environment'
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
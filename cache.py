@@ -0,0 +1,179 @@
+"""
+Prediction cache untuk YOLO BISINDO Predictor
+Key = hash pixel hasil decode + versi model, LRU dibatasi jumlah entry dan bytes,
+opsional disimpan ke disk supaya tetap ada setelah restart
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """LRU cache vector probabilitas per gambar"""
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, persist_dir=None):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.persist_dir = persist_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config):
+        """Buat cache dari performance.prediction_cache_*, None kalau dimatikan"""
+        performance = (config or {}).get("performance", {})
+        max_entries = int(performance.get("prediction_cache_entries", 0))
+        if max_entries <= 0:
+            return None
+        return cls(
+            max_entries=max_entries,
+            max_bytes=float(performance.get("prediction_cache_mb", 64)) * 1024 * 1024,
+            persist_dir=performance.get("prediction_cache_dir") or None,
+        )
+
+    @staticmethod
+    def image_key(image, model_version):
+        """Hash konten: shape + dtype + pixel + versi model"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{model_version}|{image.shape}|{image.dtype}".encode("utf-8"))
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Ambil probs dari memory, lalu dari disk; None kalau miss"""
+        with self._lock:
+            probs = self._entries.get(key)
+            if probs is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return probs
+
+        probs = self._load(key)
+        with self._lock:
+            if probs is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._insert(key, probs)
+        return probs
+
+    def put(self, key, probs):
+        probs = np.array(probs, dtype=np.float32)
+        self._insert(key, probs)
+        self._store(key, probs)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _insert(self, key, probs):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = probs
+            self._bytes += probs.nbytes
+
+            # Evict least recently used sampai batas entry dan bytes terpenuhi
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def _path(self, key):
+        return os.path.join(self.persist_dir, f"{key}.npy")
+
+    def _load(self, key):
+        if not self.persist_dir:
+            return None
+        try:
+            return np.load(self._path(key))
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key, probs):
+        if not self.persist_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, probs)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        self._writes += 1
+        if self._writes % 256 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Batasi file di disk ke max_entries terbaru (berdasarkan mtime)"""
+        try:
+            files = [e for e in os.scandir(self.persist_dir) if e.name.endswith(".npy")]
+            files.sort(key=lambda e: e.stat().st_mtime)
+            for entry in files[:-self.max_entries]:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+class CachedBackend:
+    """Backend wrapper: hanya gambar yang belum pernah dilihat masuk ke model"""
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+
+    def __getattr__(self, name):
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def predict(self, batch):
+        version = self.backend.version
+        keys = [PredictionCache.image_key(image, version) for image in batch]
+        results = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, probs in enumerate(results) if probs is None]
+        if missing:
+            # Semua miss dalam satu forward pass
+            probs = self.backend.predict([batch[i] for i in missing])
+            for i, row in zip(missing, probs):
+                self.cache.put(keys[i], row)
+                results[i] = row
+
+        if not results:
+            return self.backend.predict([])
+        return np.stack(results)
+
+    def predict_one(self, image):
+        return self.predict([image])[0]
+
+
+# Export cache
+__all__ = [
+    'PredictionCache',
+    'CachedBackend'
+]
@@ -0,0 +1,134 @@
+"""
+Model cascade untuk YOLO BISINDO Predictor
+Model cepat (mis. TFLite) menjawab dulu; hanya gambar yang top-1-nya di bawah threshold
+diteruskan ke model akurat (best.pt). Escalation rate dan agreement dicatat
+"""
+
+import threading
+
+import numpy as np
+
+# Dibandingkan dengan confidence top-1 model cepat per gambar: di bawah 0.5 berarti kelas teratas
+# bukan mayoritas probabilitas. Nilai yang pas untuk model tertentu dipilih lewat
+# `evaluate.py --cascade --thresholds ...` (escalation rate vs top-1)
+DEFAULT_THRESHOLD = 0.5
+
+
+class CascadeBackend:
+    """Backend dua tahap, kontrak sama dengan backend biasa
+
+    Atribut lain (names, imgsz, model_path, ...) didelegasikan ke model akurat.
+    audit_rate: fraksi jawaban model cepat yang tetap dicek model akurat, untuk
+    mengukur agreement jawaban yang tidak di-escalate
+    """
+
+    name = "cascade"
+
+    def __init__(self, fast, accurate, threshold=DEFAULT_THRESHOLD, audit_rate=0.0, seed=None):
+        if fast.num_classes != accurate.num_classes:
+            raise ValueError(f"Jumlah kelas berbeda: {fast.num_classes} (cepat) vs {accurate.num_classes} (akurat)")
+        self.fast = fast
+        self.accurate = accurate
+        self.threshold = float(threshold)
+        self.audit_rate = float(audit_rate)
+        self.total = 0
+        self.escalated = 0
+        self.escalated_agreed = 0
+        self.audited = 0
+        self.audit_agreed = 0
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, fast, accurate):
+        """Cascade dari config.json "cascade" (threshold, audit_rate)"""
+        cascade_config = (config or {}).get("cascade", {})
+        return cls(
+            fast, accurate,
+            threshold=float(cascade_config.get("threshold", DEFAULT_THRESHOLD)),
+            audit_rate=float(cascade_config.get("audit_rate", 0.0)),
+        )
+
+    def __getattr__(self, name):
+        if name in ("fast", "accurate"):
+            raise AttributeError(name)
+        return getattr(self.accurate, name)
+
+    @property
+    def version(self):
+        # Kunci cache prediksi ikut berubah kalau salah satu model atau threshold berubah
+        return f"cascade:{self.fast.version}:{self.accurate.version}:{self.threshold}"
+
+    def predict(self, batch):
+        probs = np.array(self.fast.predict(batch), dtype=np.float32)
+        if len(probs) == 0:
+            return probs
+
+        escalate = probs.max(axis=1) < self.threshold
+        audit = np.zeros_like(escalate)
+        if self.audit_rate > 0:
+            audit = ~escalate & (self._rng.random(len(probs)) < self.audit_rate)
+
+        second = np.flatnonzero(escalate | audit)
+        agreed = np.zeros(0, dtype=bool)
+        if second.size:
+            # Semua gambar tahap kedua dalam satu forward pass
+            accurate_probs = np.asarray(self.accurate.predict([batch[i] for i in second]))
+            agreed = probs[second].argmax(axis=1) == accurate_probs.argmax(axis=1)
+            probs[second[escalate[second]]] = accurate_probs[escalate[second]]
+
+        with self._lock:
+            self.total += len(probs)
+            self.escalated += int(escalate.sum())
+            self.escalated_agreed += int(agreed[escalate[second]].sum())
+            self.audited += int(audit.sum())
+            self.audit_agreed += int(agreed[audit[second]].sum())
+        return probs
+
+    def predict_one(self, image):
+        return self.predict([image])[0]
+
+    def stats(self):
+        """escalation_rate, agreement gambar yang di-escalate dan (kalau audit aktif) yang diterima"""
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "total": self.total,
+                "escalated": self.escalated,
+                "escalation_rate": self.escalated / self.total if self.total else 0.0,
+                # Seberapa sering model akurat setuju dengan model cepat pada gambar yang ragu
+                "escalated_agreement": self.escalated_agreed / self.escalated if self.escalated else None,
+                # Perkiraan akurasi relatif jawaban yang tidak di-escalate
+                "accepted_agreement": self.audit_agreed / self.audited if self.audited else None,
+                "audited": self.audited,
+            }
+
+
+def sweep_thresholds(fast_probs, accurate_probs, labels, thresholds, fast_ms=0.0, accurate_ms=0.0):
+    """Simulasi cascade untuk beberapa threshold dari output kedua model pada dataset yang sama
+
+    Return list dict (threshold, escalation_rate, top1, agreement, latency_ms perkiraan per gambar)
+    """
+    fast_top = fast_probs.argmax(axis=1)
+    accurate_top = accurate_probs.argmax(axis=1)
+    confidence = fast_probs.max(axis=1)
+    rows = []
+    for threshold in thresholds:
+        escalate = confidence < threshold
+        prediction = np.where(escalate, accurate_top, fast_top)
+        rate = float(escalate.mean())
+        rows.append({
+            "threshold": float(threshold),
+            "escalation_rate": rate,
+            "top1": float((prediction == labels).mean()),
+            "agreement": float((prediction == accurate_top).mean()),
+            "latency_ms": fast_ms + rate * accurate_ms,
+        })
+    return rows
+
+
+# Export cascade
+__all__ = [
+    'CascadeBackend',
+    'sweep_thresholds'
+]
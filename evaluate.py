@@ -0,0 +1,266 @@
+"""
+Evaluasi akurasi untuk YOLO BISINDO Predictor
+Dataset class-per-directory (A/, B/, ... Z/), metrik top-1 / top-5 seperti results (1).csv,
+akurasi per kelas, confusion matrix dan throughput
+
+Contoh:
+    python evaluate.py --data dataset/val
+    python evaluate.py --data dataset/val --model tflite_float16 --workers 8 --output eval.json
+    python evaluate.py --data dataset/val --cascade --thresholds 0.5,0.8,0.9,0.95
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backends import create_backend
+from batching import iter_batches
+from cascade import sweep_thresholds
+from ingest import decode_image
+from utils import ConfigManager, ValidationUtils
+
+# Jumlah batch yang di-decode di depan inference (memory tetap terbatas)
+PREFETCH_BATCHES = 2
+
+
+def list_labeled_images(root, names):
+    """List (path, class_id) dari folder per kelas, nama folder dicocokkan ke names model"""
+    class_ids = {str(name).lower(): int(idx) for idx, name in names.items()}
+    samples = []
+    for folder in sorted(os.listdir(root)):
+        class_dir = os.path.join(root, folder)
+        if not os.path.isdir(class_dir) or folder.lower() not in class_ids:
+            continue
+        for name in sorted(os.listdir(class_dir)):
+            path = os.path.join(class_dir, name)
+            if ValidationUtils.is_valid_image_file(path):
+                samples.append((path, class_ids[folder.lower()]))
+    return samples
+
+
+def load_sample(path, min_side=None):
+    with open(path, "rb") as f:
+        return decode_image(f.read(), min_side)
+
+
+def _safe_load(path, min_side):
+    try:
+        return load_sample(path, min_side), None
+    except Exception as e:
+        return None, str(e)
+
+
+def iter_decoded_batches(samples, min_side, batch_size=32, workers=None):
+    """Generator (batch samples, list (image, error)); decode paralel di thread pool
+
+    Hanya PREFETCH_BATCHES batch yang di-decode di depan, jadi decode berjalan
+    bersamaan dengan inference tanpa menampung seluruh dataset di memory
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        batches = iter_batches(samples, batch_size)
+        pending = deque()
+
+        def schedule():
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append((batch, [pool.submit(_safe_load, path, min_side) for path, _ in batch]))
+
+        for _ in range(PREFETCH_BATCHES + 1):
+            schedule()
+        while pending:
+            batch, futures = pending.popleft()
+            schedule()
+            yield batch, [future.result() for future in futures]
+
+
+def evaluate_backend(backend, samples, batch_size=32, workers=None, keep_probs=False):
+    """Akurasi top-1 / top-5, per kelas dan confusion matrix backend pada list (path, class_id)
+
+    confusion[i, j] = jumlah gambar kelas i yang diprediksi sebagai kelas j.
+    keep_probs: simpan output (N, C) dan label gambar yang berhasil di-decode
+    """
+    num_classes = backend.num_classes
+    confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+    top5 = 0
+    failed = []
+    inference_time = 0.0
+    kept_probs = []
+    kept_labels = []
+
+    start = time.perf_counter()
+    for batch, decoded in iter_decoded_batches(samples, backend.imgsz, batch_size, workers):
+        images = []
+        labels = []
+        for (path, label), (image, error) in zip(batch, decoded):
+            if error is not None:
+                failed.append({"path": path, "error": error})
+                continue
+            images.append(image)
+            labels.append(label)
+        if not images:
+            continue
+
+        inference_start = time.perf_counter()
+        probs = backend.predict(images)
+        inference_time += time.perf_counter() - inference_start
+
+        labels = np.array(labels)
+        if keep_probs:
+            kept_probs.append(np.asarray(probs))
+            kept_labels.append(labels)
+        ranked = np.argsort(probs, axis=1)[:, ::-1]
+        np.add.at(confusion, (labels, ranked[:, 0]), 1)
+        top5 += int((ranked[:, :5] == labels[:, None]).any(axis=1).sum())
+
+    elapsed = time.perf_counter() - start
+    count = int(confusion.sum())
+    support = confusion.sum(axis=1)
+    correct = np.diag(confusion)
+    per_class = {
+        backend.names[idx]: {
+            "support": int(support[idx]),
+            "accuracy": float(correct[idx] / support[idx]) if support[idx] else None,
+        }
+        for idx in range(num_classes)
+    }
+    metrics = {
+        "count": count,
+        "failed": failed,
+        "top1": float(correct.sum() / count) if count else 0.0,
+        "top5": top5 / count if count else 0.0,
+        "per_class": per_class,
+        "confusion": confusion,
+        "elapsed_s": elapsed,
+        "inference_s": inference_time,
+        "images_per_sec": count / elapsed if elapsed > 0 else 0.0,
+    }
+    if keep_probs:
+        metrics["probs"] = np.concatenate(kept_probs) if kept_probs else np.zeros((0, num_classes), dtype=np.float32)
+        metrics["labels"] = np.concatenate(kept_labels) if kept_labels else np.zeros(0, dtype=np.int64)
+    return metrics
+
+
+def print_report(backend, metrics):
+    print(f"\n🎯 {metrics['count']} gambar | top-1 {metrics['top1']*100:.2f}% | top-5 {metrics['top5']*100:.2f}%")
+    print(f"⏱️ {metrics['elapsed_s']:.1f}s ({metrics['images_per_sec']:.1f} img/s, "
+          f"inference {metrics['inference_s']:.1f}s)")
+    if metrics["failed"]:
+        print(f"⚠️ {len(metrics['failed'])} gambar gagal dibaca")
+
+    print("\nAkurasi per kelas:")
+    for name, stats in metrics["per_class"].items():
+        if stats["support"]:
+            print(f"   {name:>3} {stats['accuracy']*100:6.2f}%  (n={stats['support']})")
+
+    confusion = metrics["confusion"]
+    labels = [str(backend.names[idx]) for idx in range(backend.num_classes)]
+    print("\nConfusion matrix (baris = label, kolom = prediksi):")
+    print("    " + "".join(f"{label:>5}" for label in labels))
+    for label, row in zip(labels, confusion):
+        if row.sum():
+            print(f"{label:>3} " + "".join(f"{value:>5}" if value else "    ." for value in row))
+
+
+def evaluate_cascade(fast, accurate, samples, thresholds, batch_size=32, workers=None):
+    """Jalankan kedua model sekali, lalu simulasikan cascade untuk tiap threshold"""
+    fast_metrics = evaluate_backend(fast, samples, batch_size, workers, keep_probs=True)
+    accurate_metrics = evaluate_backend(accurate, samples, batch_size, workers, keep_probs=True)
+    count = max(1, fast_metrics["count"])
+    return sweep_thresholds(
+        fast_metrics["probs"], accurate_metrics["probs"], fast_metrics["labels"], thresholds,
+        fast_ms=fast_metrics["inference_s"] * 1000 / count, accurate_ms=accurate_metrics["inference_s"] * 1000 / count,
+    ), fast_metrics, accurate_metrics
+
+
+def print_cascade_report(fast, accurate, rows, fast_metrics, accurate_metrics):
+    count = fast_metrics["count"]
+    print(f"\n⚡ Cepat : {fast.model_path} ({fast.name}) top-1 {fast_metrics['top1']*100:.2f}% | "
+          f"{fast_metrics['inference_s'] * 1000 / max(1, count):.2f} ms/gambar")
+    print(f"🎯 Akurat: {accurate.model_path} ({accurate.name}) top-1 {accurate_metrics['top1']*100:.2f}% | "
+          f"{accurate_metrics['inference_s'] * 1000 / max(1, count):.2f} ms/gambar")
+    print(f"\n{'threshold':>9} {'escalate':>9} {'top-1':>8} {'agreement':>10} {'ms/gambar':>10}")
+    for row in rows:
+        print(f"{row['threshold']:>9.2f} {row['escalation_rate']*100:>8.1f}% {row['top1']*100:>7.2f}% "
+              f"{row['agreement']*100:>9.2f}% {row['latency_ms']:>10.2f}")
+
+
+def write_report(path, backend, metrics):
+    """JSON (metrik + confusion matrix) atau CSV confusion matrix kalau path berakhiran .csv"""
+    labels = [str(backend.names[idx]) for idx in range(backend.num_classes)]
+    if path.endswith(".csv"):
+        with open(path, "w") as f:
+            f.write("label," + ",".join(labels) + "\n")
+            for label, row in zip(labels, metrics["confusion"]):
+                f.write(label + "," + ",".join(str(value) for value in row) + "\n")
+        return
+
+    report = dict(metrics, confusion=metrics["confusion"].tolist(), labels=labels,
+                  model=backend.model_path, backend=backend.name)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO BISINDO evaluasi dataset berlabel")
+    parser.add_argument("--data", required=True, help="Folder per kelas (A/, B/, ... Z/)")
+    parser.add_argument("--model", default=None, help="Key model di config.json (default: performance.model)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None, help="Thread decode (default: otomatis)")
+    parser.add_argument("--limit", type=int, default=0, help="Evaluasi maksimal N gambar, diambil merata (tiap k gambar) dari semua kelas")
+    parser.add_argument("--output", default=None, help="Tulis laporan ke .json atau confusion matrix ke .csv")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Simulasi cascade: cascade.fast_model -> --model, untuk memilih cascade.threshold")
+    parser.add_argument("--thresholds", default="0.5,0.7,0.8,0.9,0.95,0.99", help="Threshold untuk --cascade")
+    args = parser.parse_args()
+
+    backend = create_backend(args.model)
+    samples = list_labeled_images(args.data, backend.names)
+    if args.limit:
+        # Sampling merata antar kelas, bukan hanya kelas pertama
+        samples = samples[::max(1, len(samples) // args.limit)][:args.limit]
+    if not samples:
+        print(f"❌ Tidak ada gambar berlabel di {args.data}")
+        return 1
+
+    print(f"📂 {len(samples)} gambar dari {args.data} | model {backend.model_path} ({backend.name})")
+    if args.cascade:
+        config = ConfigManager.load_config() or {}
+        fast = create_backend(config.get("cascade", {}).get("fast_model", "tflite_float16"), config)
+        thresholds = [float(value) for value in args.thresholds.split(",") if value.strip()]
+        rows, fast_metrics, accurate_metrics = evaluate_cascade(
+            fast, backend, samples, thresholds, args.batch_size, args.workers
+        )
+        print_cascade_report(fast, backend, rows, fast_metrics, accurate_metrics)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(rows, f, indent=2)
+            print(f"\n📄 Laporan ditulis ke {args.output}")
+        return 0
+
+    metrics = evaluate_backend(backend, samples, args.batch_size, args.workers)
+    print_report(backend, metrics)
+
+    if args.output:
+        write_report(args.output, backend, metrics)
+        print(f"\n📄 Laporan ditulis ke {args.output}")
+    return 0
+
+
+# Export evaluate
+__all__ = [
+    'evaluate_backend',
+    'evaluate_cascade',
+    'iter_decoded_batches',
+    'list_labeled_images',
+    'load_sample'
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
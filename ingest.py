@@ -0,0 +1,166 @@
+"""
+Image ingestion untuk YOLO BISINDO Predictor
+Validasi header (magic bytes + dimensi) sebelum decode, lalu decode langsung di
+resolusi kecil (JPEG DCT scaling) ke array RGB contiguous dengan orientasi EXIF
+"""
+
+import io
+import struct
+
+import numpy as np
+
+from metrics import METRICS
+
+# Batas pixel sebelum decode: file kecil dengan dimensi raksasa (decompression bomb) ditolak
+MAX_IMAGE_PIXELS = 50_000_000
+
+# Marker SOF JPEG yang berisi dimensi (C4 = DHT, C8 = JPG, CC = DAC bukan SOF)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def as_buffer(data):
+    """memoryview dari bytes / bytearray / memoryview / BytesIO (UploadedFile) tanpa copy"""
+    if hasattr(data, "getbuffer"):
+        return data.getbuffer()
+    return memoryview(data)
+
+
+def _probe_jpeg(view):
+    offset = 2
+    while offset + 9 <= len(view):
+        if view[offset] != 0xFF:
+            raise ValueError("Header JPEG rusak")
+        marker = view[offset + 1]
+        # Padding 0xFF dan marker tanpa panjang (RSTn, TEM)
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            offset += 2
+            continue
+        if marker in _JPEG_SOF:
+            height, width = struct.unpack_from(">HH", view, offset + 5)
+            return width, height
+        offset += 2 + struct.unpack_from(">H", view, offset + 2)[0]
+    raise ValueError("Header JPEG tidak lengkap")
+
+
+def _probe_pillow(view):
+    """Format lain (WEBP, TIFF, ...): Image.open hanya membaca header, pixel belum di-decode"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(view)) as img:
+            return (img.format or "unknown").lower(), img.width, img.height
+    except Image.DecompressionBombError as e:
+        raise OverflowError(str(e))
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ValueError("Format gambar tidak dikenali")
+
+
+def probe_image(data):
+    """(format, width, height) dari magic bytes + header saja, tanpa decode
+
+    JPEG, PNG, BMP dan GIF dibaca langsung dari header; format lain lewat Pillow
+    (Image.open tanpa decode pixel). ValueError kalau bukan gambar atau header terpotong
+    """
+    view = as_buffer(data)
+    head = bytes(view[:8])
+    if head[:3] == b"\xff\xd8\xff":
+        return ("jpeg",) + _probe_jpeg(view)
+    if len(view) < 26:
+        raise ValueError("File terlalu kecil untuk sebuah gambar")
+    if head == b"\x89PNG\r\n\x1a\n":
+        return ("png",) + struct.unpack_from(">II", view, 16)
+    if head[:2] == b"BM":
+        if struct.unpack_from("<I", view, 14)[0] == 12:
+            # BITMAPCOREHEADER (OS/2): lebar dan tinggi 16-bit unsigned
+            return ("bmp",) + struct.unpack_from("<HH", view, 18)
+        width, height = struct.unpack_from("<ii", view, 18)
+        # Tinggi negatif = bitmap top-down
+        return "bmp", width, abs(height)
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return ("gif",) + struct.unpack_from("<HH", view, 6)
+    return _probe_pillow(view)
+
+
+def validate_image(data, max_pixels=MAX_IMAGE_PIXELS):
+    """probe_image + cek dimensi; OverflowError kalau terlalu besar (decompression bomb)"""
+    fmt, width, height = probe_image(data)
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Dimensi gambar tidak valid: {width}x{height}")
+    if max_pixels and width * height > max_pixels:
+        raise OverflowError(f"Gambar {width}x{height} melebihi batas {max_pixels // 1_000_000} megapixel")
+    return fmt, width, height
+
+
+def _reduce_flag(cv2, fmt, width, height, min_side):
+    """Flag imdecode dengan skala 1/2, 1/4, 1/8 terbesar yang sisi pendeknya tetap >= min_side
+
+    Hanya JPEG yang benar-benar decode lebih kecil, format lain tetap decode penuh
+    """
+    if min_side and fmt == "jpeg":
+        for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                             (2, cv2.IMREAD_REDUCED_COLOR_2)):
+            if min(width, height) // factor >= min_side:
+                return flag
+    return cv2.IMREAD_COLOR
+
+
+def _decode_pillow(view, min_side):
+    """Fallback untuk format yang tidak didukung imdecode (mis. GIF di OpenCV lama)"""
+    from PIL import Image, ImageOps
+
+    img = Image.open(io.BytesIO(view))
+    if min_side:
+        img.draft('RGB', (min_side, min_side))
+    img = ImageOps.exif_transpose(img)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if min_side:
+        factor = min(img.size) // min_side
+        if factor >= 2:
+            img = img.reduce(factor)
+    return np.array(img)
+
+
+def decode_image(data, min_side=None, max_pixels=MAX_IMAGE_PIXELS):
+    """Decode gambar ke numpy array RGB uint8 (HWC, contiguous, writable)
+
+    data: bytes / bytearray / memoryview / BytesIO (UploadedFile), dibaca lewat memoryview
+    tanpa copy. Header divalidasi dulu (ValueError / OverflowError sebelum decode).
+    Kalau min_side di-set, sisi pendek hasil decode diperkecil sedekat mungkin ke
+    min_side (tidak kurang): JPEG memakai DCT scaling (1/2, 1/4, 1/8) saat decode,
+    sisanya box filter. Orientasi EXIF diterapkan
+    """
+    with METRICS.time("decode"):
+        view = as_buffer(data)
+        fmt, width, height = validate_image(view, max_pixels)
+
+        import cv2
+
+        image = None
+        if fmt != "gif":
+            # imdecode menulis langsung ke satu array baru, lalu BGR -> RGB in-place
+            image = cv2.imdecode(np.frombuffer(view, dtype=np.uint8), _reduce_flag(cv2, fmt, width, height, min_side))
+        if image is None:
+            return _decode_pillow(view, min_side)
+
+        if min_side:
+            # Sisa skala setelah DCT scaling: box filter faktor bulat, sisa pixel di tepi dibuang
+            factor = min(image.shape[:2]) // min_side
+            if factor >= 2:
+                height, width = image.shape[0] // factor, image.shape[1] // factor
+                image = cv2.resize(image[:height * factor, :width * factor], (width, height),
+                                   interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+
+
+# Export ingest
+__all__ = [
+    'MAX_IMAGE_PIXELS',
+    'as_buffer',
+    'decode_image',
+    'probe_image',
+    'validate_image'
+]
@@ -1,25 +1,111 @@
 """
 Launcher untuk YOLO BISINDO Predictor
 Jalankan file ini untuk memulai aplikasi dengan instalasi dependencies otomatis
+
+pip install hanya dijalankan kalau environment berubah (fingerprint requirements.txt,
+interpreter dan site-packages) dan requirements belum terpenuhi.
+Paksa install ulang dengan: python launcher.py --force-install
 """
 
+import hashlib
+import json
 import subprocess
 import sys
 import os
+import site
+from importlib import metadata
+
+REQUIREMENTS_FILE = "requirements.txt"
+FINGERPRINT_FILE = ".launcher_env.json"
+
+def environment_fingerprint(requirements=REQUIREMENTS_FILE):
+    """Hash isi requirements.txt + interpreter + mtime folder site-packages"""
+    digest = hashlib.sha256()
+    digest.update(sys.executable.encode("utf-8"))
+    digest.update(sys.version.encode("utf-8"))
+    with open(requirements, "rb") as f:
+        digest.update(f.read())
+    
+    # Install / uninstall paket mengubah isi (dan mtime) folder site-packages
+    for path in site.getsitepackages() + [site.getusersitepackages()]:
+        if os.path.isdir(path):
+            digest.update(f"{path}:{os.stat(path).st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+def read_fingerprint():
+    try:
+        with open(FINGERPRINT_FILE, "r") as f:
+            return json.load(f).get("fingerprint")
+    except (OSError, ValueError):
+        return None
+
+def write_fingerprint(fingerprint):
+    try:
+        with open(FINGERPRINT_FILE, "w") as f:
+            json.dump({"fingerprint": fingerprint, "python": sys.executable}, f, indent=2)
+    except OSError:
+        pass
+
+def parse_requirements(requirements=REQUIREMENTS_FILE):
+    """List requirement string dari requirements.txt (tanpa komentar / opsi pip)"""
+    with open(requirements, "r") as f:
+        lines = [line.split("#", 1)[0].strip() for line in f]
+    return [line for line in lines if line and not line.startswith("-")]
+
+def requirement_satisfied(line):
+    """Cek satu requirement lewat metadata paket yang terinstall (tanpa menjalankan pip)"""
+    try:
+        from packaging.requirements import Requirement
+    except ImportError:
+        Requirement = None
+    
+    if Requirement is not None:
+        requirement = Requirement(line)
+        try:
+            installed = metadata.version(requirement.name)
+        except metadata.PackageNotFoundError:
+            return False
+        return requirement.specifier.contains(installed, prereleases=True)
+    
+    # Tanpa packaging: hanya dukung pin persis (nama==versi) atau nama saja
+    name, _, version = line.partition("==")
+    try:
+        installed = metadata.version(name.strip())
+    except metadata.PackageNotFoundError:
+        return False
+    return not version or installed == version.strip()
 
-def install_dependencies():
-    """Install semua dependencies dari requirements.txt"""
+def missing_requirements(requirements=REQUIREMENTS_FILE):
+    return [line for line in parse_requirements(requirements) if not requirement_satisfied(line)]
+
+def install_dependencies(force=False):
+    """Install dependencies dari requirements.txt kalau belum terpenuhi"""
     print("=" * 50)
     print("  YOLO BISINDO Predictor - Dependency Installer")
     print("=" * 50)
     print()
     
+    fingerprint = environment_fingerprint()
+    if not force and read_fingerprint() == fingerprint:
+        print("✅ Environment tidak berubah, skip instalasi")
+        return True
+    
+    missing = missing_requirements()
+    if not force and not missing:
+        print("✅ Semua dependencies sudah terpenuhi")
+        write_fingerprint(fingerprint)
+        return True
+    
     try:
+        if missing:
+            print(f"📦 Dependencies belum terpenuhi: {', '.join(missing)}")
         print("📦 Menginstall dependencies...")
         subprocess.check_call(
-            [sys.executable, "-m", "pip", "install", "-r", "requirements.txt"]
+            [sys.executable, "-m", "pip", "install", "-r", REQUIREMENTS_FILE]
         )
         print("✅ Dependencies berhasil diinstall")
+        # Fingerprint dihitung ulang karena pip baru saja mengubah site-packages
+        write_fingerprint(environment_fingerprint())
         return True
     except Exception as e:
         print(f"❌ Error saat menginstall: {e}")
@@ -38,8 +124,8 @@ def run_streamlit():
         print(f"❌ Error saat menjalankan Streamlit: {e}")
 
 if __name__ == "__main__":
-    # Install dependencies
-    if install_dependencies():
+    # Install dependencies (skip kalau environment sama dengan launch sebelumnya)
+    if install_dependencies(force="--force-install" in sys.argv[1:]):
         # Jalankan Streamlit
         run_streamlit()
     else:
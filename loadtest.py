@@ -0,0 +1,342 @@
+"""
+Load test untuk YOLO BISINDO Predictor
+Simulasi N client bersamaan terhadap server inference (server.py, backend + micro-batcher
+yang sama dengan app), naik bertahap per jumlah client; catat latency p50/p99, error
+rate dan throughput per detik. Tanpa --url, server.py dijalankan lokal di port bebas
+
+Mode:
+    upload  tiap client mengirim gambar dengan arrival Poisson (--rate request/s per client);
+            latency dihitung dari waktu jadwal, antrean di sisi client ikut terhitung
+    stream  tiap client mengirim frame kamera dengan --fps tetap; frame yang jadwalnya
+            terlewat karena response sebelumnya belum datang di-drop (seperti komponen kamera)
+
+Contoh:
+    python loadtest.py --mode upload --clients 1,4,16,32 --rate 0.5 --duration 30
+    python loadtest.py --mode stream --clients 1,2,4,8 --fps 10 --slo-ms 300 --output load.json
+    python loadtest.py --url http://10.0.0.5:8000 --images dataset/val/A --model tflite_float16
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+import numpy as np
+
+from benchmark import parse_list, parse_resolution
+from utils import ValidationUtils
+
+
+def make_payloads(images=None, resolution=(480, 640), count=16, quality=80, seed=0):
+    """Body request: file gambar dari direktori (apa adanya) atau JPEG synthetic dengan seed tetap"""
+    if images:
+        payloads = []
+        for name in sorted(os.listdir(images)):
+            path = os.path.join(images, name)
+            if ValidationUtils.is_valid_image_file(path):
+                with open(path, "rb") as f:
+                    payloads.append(f.read())
+            if len(payloads) >= count:
+                break
+        if not payloads:
+            raise ValueError(f"Tidak ada gambar di {images}")
+        return payloads
+
+    import cv2
+
+    height, width = resolution
+    rng = np.random.default_rng(seed)
+    payloads = []
+    for _ in range(count):
+        # Noise halus (bukan noise per pixel) supaya ukuran JPEG mirip foto kamera
+        small = rng.integers(0, 256, (max(1, height // 16), max(1, width // 16), 3), dtype=np.uint8)
+        image = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+        ok, data = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        payloads.append(data.tobytes())
+    return payloads
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(model=None, timeout=180.0):
+    """Jalankan server.py di process terpisah (client dan server tidak berbagi GIL)
+
+    Return (process, url, log_file); tunggu sampai /health menjawab
+    """
+    port = free_port()
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+               "--host", "127.0.0.1", "--port", str(port)]
+    if model:
+        command += ["--model", model]
+    log_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process, url, log_file
+        except OSError:
+            pass
+        time.sleep(0.5)
+
+    process.kill()
+    process.wait()
+    log_file.seek(0)
+    output = log_file.read().decode("utf-8", "replace")
+    raise RuntimeError(f"server.py tidak siap dalam {timeout:.0f}s:\n{output[-2000:]}")
+
+
+def _client(url, path, payloads, mode, interval, start, deadline, timeout, seed, samples):
+    """Satu client dengan satu koneksi keep-alive; sample: (t_selesai, latency_s, error atau None)"""
+    parsed = urlparse(url)
+    rng = np.random.default_rng(seed)
+    connection = None
+    index = int(rng.integers(len(payloads)))
+    dropped = 0
+    # Offset acak supaya client tidak mengirim serentak
+    scheduled = start + float(rng.uniform(0, interval))
+
+    while scheduled < deadline:
+        now = time.perf_counter()
+        if now < scheduled:
+            time.sleep(scheduled - now)
+        elif mode == "stream" and now - scheduled >= interval:
+            # Masih menunggu response frame sebelumnya, frame yang terlewat tidak dikirim
+            skipped = int((now - scheduled) // interval)
+            dropped += skipped
+            scheduled += skipped * interval
+
+        sent = time.perf_counter()
+        body = payloads[index % len(payloads)]
+        index += 1
+        error = None
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+            connection.request("POST", path, body, {"Content-Type": "application/octet-stream"})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                error = f"HTTP {response.status}"
+        except (OSError, http.client.HTTPException) as e:
+            error = type(e).__name__
+            if connection is not None:
+                connection.close()
+            connection = None
+        done = time.perf_counter()
+
+        # upload: dari jadwal (open loop), stream: dari kirim (frame tidak pernah antre di client)
+        origin = scheduled if mode == "upload" else sent
+        samples.append((done - start, done - origin, error))
+        if mode == "upload":
+            scheduled += float(rng.exponential(interval))
+        else:
+            scheduled += interval
+
+    if connection is not None:
+        connection.close()
+    return dropped
+
+
+def run_step(url, payloads, clients, mode="upload", rate=1.0, fps=10.0, duration=10.0,
+             model=None, timeout=10.0, seed=0):
+    """Jalankan satu tahap dengan `clients` client selama `duration` detik, return (samples, frame di-drop, elapsed)"""
+    query = {"format": "bin"}
+    if model:
+        query["model"] = model
+    path = f"/predict?{urlencode(query)}"
+    interval = 1.0 / (rate if mode == "upload" else fps)
+
+    samples = []
+    drops = [0] * clients
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def worker(index):
+        drops[index] = _client(url, path, payloads, mode, interval, start, deadline, timeout, seed + index, samples)
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, sum(drops), time.perf_counter() - start
+
+
+def summarize(samples, elapsed, offered_rps):
+    """Ringkasan satu tahap: throughput, p50/p95/p99 request sukses dan error rate"""
+    latencies = np.array([latency for _, latency, error in samples if error is None]) * 1000
+    errors = {}
+    for _, _, error in samples:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    total = len(samples)
+    failed = sum(errors.values())
+    summary = {
+        "requests": total,
+        "offered_rps": round(offered_rps, 2),
+        "throughput_rps": round((total - failed) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "errors": errors,
+    }
+    for q in (50, 95, 99):
+        summary[f"p{q}_ms"] = round(float(np.percentile(latencies, q)), 1) if latencies.size else None
+    summary["max_ms"] = round(float(latencies.max()), 1) if latencies.size else None
+    return summary
+
+
+def timeline(samples, window=1.0):
+    """Per window (detik sejak tahap mulai): selesai, error, throughput, p50/p99"""
+    buckets = {}
+    for finished, latency, error in samples:
+        buckets.setdefault(int(finished // window), []).append((latency, error))
+    rows = []
+    for index in sorted(buckets):
+        items = buckets[index]
+        latencies = np.array([latency for latency, error in items if error is None]) * 1000
+        rows.append({
+            "t": round(index * window, 3),
+            "completed": len(items),
+            "errors": sum(1 for _, error in items if error is not None),
+            "throughput_rps": round(latencies.size / window, 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 1) if latencies.size else None,
+            "p99_ms": round(float(np.percentile(latencies, 99)), 1) if latencies.size else None,
+        })
+    return rows
+
+
+def find_capacity(steps, slo_ms, max_error_rate=0.01, max_drop_rate=None):
+    """Jumlah client terbesar yang p99 <= slo_ms, error rate <= max_error_rate dan
+    (kalau diberikan) frame di-drop <= max_drop_rate
+
+    Berhenti di tahap pertama yang gagal (tahap berikutnya tidak dihitung walau kebetulan lolos)
+    """
+    capacity = 0
+    for step in steps:
+        p99 = step["p99_ms"]
+        if p99 is None or p99 > slo_ms or step["error_rate"] > max_error_rate:
+            break
+        if max_drop_rate is not None and step["drop_rate"] > max_drop_rate:
+            break
+        capacity = step["clients"]
+    return capacity
+
+
+def print_report(steps, mode, slo_ms, max_drop_rate=None):
+    print(f"\n{'clients':>8} {'offered':>8} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'error':>7} {'drop':>7}")
+    for step in steps:
+        cells = [f"{step[key]:>8.1f}" if step[key] is not None else f"{'-':>8}"
+                 for key in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{step['clients']:>8} {step['offered_rps']:>8.1f} {step['throughput_rps']:>8.1f} {' '.join(cells)} "
+              f"{step['error_rate'] * 100:>6.1f}% {step['drop_rate'] * 100:>6.1f}%")
+    if slo_ms:
+        capacity = find_capacity(steps, slo_ms, max_drop_rate=max_drop_rate)
+        unit = "client stream" if mode == "stream" else "client upload"
+        drop = f", drop <= {max_drop_rate * 100:.0f}%" if max_drop_rate is not None else ""
+        print(f"\n🎯 Kapasitas dengan p99 <= {slo_ms:.0f} ms, error <= 1%{drop}: {capacity} {unit}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO BISINDO concurrent-client load test")
+    parser.add_argument("--url", default=None, help="Server yang diuji (default: jalankan server.py lokal)")
+    parser.add_argument("--model", default=None,
+                        help="Key model: untuk server lokal --model, untuk --url ?model=<key>")
+    parser.add_argument("--mode", choices=("upload", "stream"), default="upload")
+    parser.add_argument("--clients", default="1,2,4,8,16", help="Jumlah client per tahap, dipisah koma")
+    parser.add_argument("--rate", type=float, default=1.0, help="upload: request/s per client (Poisson)")
+    parser.add_argument("--fps", type=float, default=10.0, help="stream: frame/s per client")
+    parser.add_argument("--duration", type=float, default=10.0, help="Detik per tahap")
+    parser.add_argument("--images", default=None, help="Folder gambar (default: JPEG synthetic)")
+    parser.add_argument("--resolution", default="480x640", help="Resolusi JPEG synthetic (HxW)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Timeout per request (detik)")
+    parser.add_argument("--window", type=float, default=1.0, help="Lebar window timeline (detik)")
+    parser.add_argument("--slo-ms", type=float, default=None, help="Target p99 untuk menghitung kapasitas")
+    parser.add_argument("--max-drop-rate", type=float, default=None,
+                        help="stream: batas fraksi frame di-drop untuk menghitung kapasitas (mis. 0.1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Simpan hasil + timeline ke JSON")
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.images, parse_resolution(args.resolution), seed=args.seed)
+    process = log_file = None
+    url = args.url
+    if url is None:
+        print("🚀 Menjalankan server.py lokal...")
+        process, url, log_file = start_server(args.model)
+    # Server lokal sudah memakai --model sebagai model utama
+    query_model = args.model if args.url else None
+
+    per_client = args.rate if args.mode == "upload" else args.fps
+    average_kb = sum(len(payload) for payload in payloads) / len(payloads) / 1024
+    print(f"📡 {url} | mode {args.mode} | {per_client:g} {'req' if args.mode == 'upload' else 'frame'}/s "
+          f"per client | {args.duration:g}s per tahap | payload ~{average_kb:.0f} KB")
+
+    steps = []
+    try:
+        for clients in parse_list(args.clients, int):
+            samples, dropped, elapsed = run_step(
+                url, payloads, clients, args.mode, args.rate, args.fps, args.duration,
+                query_model, args.timeout, args.seed,
+            )
+            step = {"clients": clients, **summarize(samples, elapsed, clients * per_client), "dropped": dropped}
+            # Fraksi frame yang tidak pernah dikirim karena server tertinggal (FPS efektif turun)
+            step["drop_rate"] = round(dropped / (dropped + len(samples)), 4) if samples or dropped else 0.0
+            step["timeline"] = timeline(samples, args.window)
+            steps.append(step)
+            p99 = f"{step['p99_ms']:.1f} ms" if step["p99_ms"] is not None else "-"
+            print(f"  {clients:>4} client: {step['throughput_rps']:.1f} req/s, p99 {p99}, "
+                  f"error {step['error_rate'] * 100:.1f}%")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+            log_file.close()
+
+    print_report(steps, args.mode, args.slo_ms, args.max_drop_rate)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "url": url,
+                "mode": args.mode,
+                "model": args.model,
+                "per_client_rate": per_client,
+                "duration_s": args.duration,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "steps": steps,
+            }, f, indent=2)
+        print(f"📄 Hasil ditulis ke {args.output}")
+    return 0
+
+
+# Export loadtest
+__all__ = [
+    'find_capacity',
+    'make_payloads',
+    'run_step',
+    'start_server',
+    'summarize',
+    'timeline'
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
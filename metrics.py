@@ -0,0 +1,135 @@
+"""
+Latency metrics untuk YOLO BISINDO Predictor
+Histogram per stage (decode, preprocess, inference, postprocess, render) dengan
+clock monotonic, percentile dari window terakhir dan export format Prometheus
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+STAGES = ("decode", "preprocess", "inference", "postprocess", "render")
+
+# Batas bucket (detik), cukup rapat di rentang 1-100 ms tempat model ini biasanya berada
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LatencyHistogram:
+    """Histogram kumulatif (untuk Prometheus) + window sampel terakhir (untuk percentile)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=1024):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = np.searchsorted(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self._recent.append(seconds)
+
+    def summary(self):
+        """count, mean dan p50/p95/p99 (ms) dari window terakhir"""
+        with self._lock:
+            recent = np.array(self._recent)
+            count = self.count
+        if recent.size == 0:
+            return {"count": count, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+        p50, p95, p99 = np.percentile(recent, [50, 95, 99]) * 1000
+        return {
+            "count": count,
+            "mean_ms": float(recent.mean() * 1000),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        }
+
+    def cumulative(self):
+        """(list (le, jumlah kumulatif) termasuk +Inf, sum, count) dari satu snapshot"""
+        with self._lock:
+            counts = list(self.counts)
+            total_sum, total_count = self.sum, self.count
+        running = 0
+        buckets = []
+        for le, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            buckets.append((le, running))
+        return buckets, total_sum, total_count
+
+
+class StageMetrics:
+    """Registry histogram per stage, aman dipakai dari banyak thread"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=1024):
+        self.buckets = buckets
+        self.window = window
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram(self.buckets, self.window))
+        return histogram
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """with METRICS.time("decode"): ... -> durasi dicatat dengan perf_counter (monotonic)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def stages(self):
+        """Nama stage yang sudah tercatat, urutan pipeline dulu"""
+        names = list(self._histograms)
+        return [s for s in STAGES if s in names] + sorted(s for s in names if s not in STAGES)
+
+    def snapshot(self):
+        return {stage: self._histograms[stage].summary() for stage in self.stages()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def to_prometheus(self, prefix="bisindo"):
+        """Text exposition format Prometheus (histogram per stage)"""
+        name = f"{prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Latency per stage pipeline inference",
+            f"# TYPE {name} histogram",
+        ]
+        for stage in self.stages():
+            buckets, total_sum, total_count = self._histograms[stage].cumulative()
+            for le, count in buckets:
+                bound = "+Inf" if le == float("inf") else repr(le)
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total_sum:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {total_count}')
+        return "\n".join(lines) + "\n"
+
+
+# Registry global, dipakai bersama app, server dan backend dalam satu proses
+METRICS = StageMetrics()
+
+
+# Export metrics
+__all__ = [
+    'METRICS',
+    'STAGES',
+    'LatencyHistogram',
+    'StageMetrics'
+]
@@ -0,0 +1,140 @@
+"""
+Post-training INT8 quantization untuk YOLO BISINDO Predictor
+Export best.pt -> TFLite INT8 dengan calibration set, evaluasi top-1/top-5 terhadap
+model float, dan publish hanya kalau penurunan akurasi masih dalam toleransi
+
+Contoh:
+    python quantize.py --calib-dir dataset/train --eval-dir dataset/val
+    python quantize.py --calib-dir dataset/train --eval-dir dataset/val --max-top1-drop 0.02
+
+Butuh paket export ultralytics (tensorflow, onnx2tf) di mesin yang menjalankan export
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from backends import TFLiteBackend, create_backend
+from evaluate import evaluate_backend, list_labeled_images
+from utils import ConfigManager
+
+DEFAULT_SETTINGS = {
+    "max_top1_drop": 0.01,
+    "calibration_fraction": 1.0,
+    "output": "best_int8.tflite",
+    "model_key": "tflite_int8",
+}
+
+
+def prepare_calibration_root(calib_dir, workdir):
+    """Ultralytics butuh struktur dataset train/ + val/, arahkan keduanya ke calib_dir"""
+    root = os.path.join(workdir, "calib")
+    os.makedirs(root)
+    for split in ("train", "val"):
+        link = os.path.join(root, split)
+        try:
+            os.symlink(os.path.abspath(calib_dir), link, target_is_directory=True)
+        except OSError:
+            # Windows tanpa izin symlink
+            shutil.copytree(calib_dir, link)
+    return root
+
+
+def export_int8(model_path, calib_dir, imgsz, fraction, workdir):
+    """Export model PyTorch ke TFLite INT8 di workdir, return path file .tflite"""
+    from ultralytics import YOLO
+
+    # Export ultralytics menulis artefak di sebelah file model, jadi salin dulu ke workdir
+    staged_model = os.path.join(workdir, os.path.basename(model_path))
+    shutil.copy(model_path, staged_model)
+
+    model = YOLO(staged_model)
+    exported = model.export(
+        format="tflite",
+        int8=True,
+        data=prepare_calibration_root(calib_dir, workdir),
+        imgsz=imgsz,
+        fraction=fraction,
+    )
+    return str(exported)
+
+
+def register_model(config, key, path):
+    """Tambahkan model INT8 ke config.json supaya bisa dipilih lewat performance.model"""
+    config.setdefault("models", {})[key] = {
+        "path": path,
+        "name": "TFLite INT8",
+        "type": "detection",
+        "description": "Model TFLite INT8 (post-training quantization)",
+    }
+    ConfigManager.save_config(config)
+
+
+def print_metrics(title, metrics):
+    print(f"   {title:<16} top-1 {metrics['top1']*100:6.2f}% | top-5 {metrics['top5']*100:6.2f}% "
+          f"| {metrics['images_per_sec']:.1f} img/s")
+
+
+def main():
+    config = ConfigManager.load_config() or {}
+    settings = dict(DEFAULT_SETTINGS, **config.get("quantization", {}))
+
+    parser = argparse.ArgumentParser(description="YOLO BISINDO INT8 quantization")
+    parser.add_argument("--calib-dir", required=True, help="Folder per kelas untuk kalibrasi")
+    parser.add_argument("--eval-dir", default=None, help="Folder per kelas untuk evaluasi (default: calib-dir)")
+    parser.add_argument("--reference", default="detection", help="Key model float di config.json")
+    parser.add_argument("--max-top1-drop", type=float, default=settings["max_top1_drop"])
+    parser.add_argument("--fraction", type=float, default=settings["calibration_fraction"],
+                        help="Fraksi gambar kalibrasi yang dipakai")
+    parser.add_argument("--output", default=settings["output"])
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    eval_dir = args.eval_dir or args.calib_dir
+    if args.eval_dir is None:
+        print("⚠️ --eval-dir tidak diisi, evaluasi memakai data kalibrasi (hasil bisa terlalu optimis)")
+
+    reference = create_backend(args.reference, config)
+    samples = list_labeled_images(eval_dir, reference.names)
+    if not samples:
+        print(f"❌ Tidak ada gambar berlabel di {eval_dir}")
+        return 1
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"📦 Export INT8 dari {reference.model_path} (kalibrasi: {args.calib_dir})...")
+        start = time.perf_counter()
+        staged = export_int8(reference.model_path, args.calib_dir, reference.imgsz, args.fraction, workdir)
+        print(f"✅ Export selesai dalam {time.perf_counter() - start:.1f}s")
+
+        quantized = TFLiteBackend(staged, num_threads=int(config.get("performance", {}).get("num_threads", 0)))
+
+        print(f"\n🎯 Evaluasi pada {len(samples)} gambar...")
+        float_metrics = evaluate_backend(reference, samples, args.batch_size)
+        int8_metrics = evaluate_backend(quantized, samples, args.batch_size)
+        print_metrics(f"float ({reference.name})", float_metrics)
+        print_metrics("int8", int8_metrics)
+
+        drop = float_metrics["top1"] - int8_metrics["top1"]
+        print(f"   penurunan top-1: {drop*100:.2f}% (toleransi {args.max_top1_drop*100:.2f}%)")
+
+        if drop > args.max_top1_drop:
+            print("\n❌ Akurasi INT8 turun melebihi toleransi, model TIDAK dipublish")
+            return 1
+
+        # Tulis ke file sementara lalu rename atomik: server / app dengan hot reload
+        # tidak pernah membaca file yang setengah tersalin
+        partial = f"{args.output}.partial"
+        shutil.copy(staged, partial)
+        os.replace(partial, args.output)
+
+    register_model(config, settings["model_key"], args.output)
+    print(f"\n🎉 {args.output} dipublish sebagai models.{settings['model_key']}")
+    print(f"   Aktifkan dengan \"performance\": {{\"model\": \"{settings['model_key']}\"}} di config.json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""
+Model registry untuk YOLO BISINDO Predictor
+Hot reload: model baru di-load di background, divalidasi dengan smoke inference,
+lalu di-swap secara atomik tanpa restart app / server.
+Beberapa varian model per key dengan budget memori dan LRU eviction
+"""
+
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+from backends import create_backend, import_tflite_interpreter, resolve_model_path, warmup
+from utils import ConfigManager
+
+
+def smoke_test(backend, iterations=1):
+    """Inference dummy + cek output (1, num_classes) dan finite; raise ValueError kalau gagal"""
+    if backend.num_classes == 0:
+        raise ValueError(f"{backend.model_path}: model tidak punya nama kelas")
+
+    dummy = np.zeros((backend.imgsz, backend.imgsz, 3), dtype=np.uint8)
+    probs = np.asarray(backend.predict([dummy]))
+    if probs.shape != (1, backend.num_classes):
+        raise ValueError(f"{backend.model_path}: output {probs.shape}, seharusnya (1, {backend.num_classes})")
+    if not np.all(np.isfinite(probs)):
+        raise ValueError(f"{backend.model_path}: output mengandung NaN / Inf")
+    return warmup(backend, iterations - 1)
+
+
+def file_signature(path):
+    """(path, mtime_ns, size) atau None kalau file belum ada"""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+class ReloadableBackend:
+    """Backend yang bisa diganti saat berjalan, kontrak sama dengan backend biasa
+
+    Swap hanya mengganti referensi: request yang sedang berjalan selesai di model lama,
+    request berikutnya memakai model baru. Atribut lain didelegasikan ke model aktif
+    """
+
+    def __init__(self, backend, model_key=None, config_path="config.json", warmup_iterations=1):
+        self.backend = backend
+        self.model_key = model_key
+        self.config_path = config_path
+        self.warmup_iterations = warmup_iterations
+        self.generation = 1
+        self.loaded_at = time.time()
+        self.last_error = None
+        self._signature = file_signature(backend.model_path)
+        self._pending = None
+        self._watcher = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, backend, config, model_key=None):
+        """Bungkus backend kalau performance.hot_reload aktif, selain itu return backend
+
+        hot_reload_interval_s > 0 menyalakan watcher file model / config.json
+        """
+        performance = (config or {}).get("performance", {})
+        if not performance.get("hot_reload", False):
+            return backend
+        reloadable = cls(backend, model_key, warmup_iterations=performance.get("warmup_iterations", 1))
+        interval = float(performance.get("hot_reload_interval_s", 5))
+        if interval > 0:
+            reloadable.watch(interval)
+        return reloadable
+
+    def __getattr__(self, name):
+        # Delegasi ke model aktif (names, imgsz, model_path, version, ...)
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def predict(self, batch):
+        return self.backend.predict(batch)
+
+    def predict_one(self, image):
+        return self.backend.predict_one(image)
+
+    @property
+    def loading(self):
+        pending = self._pending
+        return pending is not None and not pending.done()
+
+    def reload(self, model_path=None):
+        """Load model di background, smoke test, lalu swap; return Future berisi backend baru
+
+        Tanpa model_path, path dibaca ulang dari config.json (performance.model bisa berubah).
+        Kalau gagal, model lama tetap aktif dan error disimpan di last_error
+        """
+        with self._lock:
+            if self.loading:
+                return self._pending
+            future = self._pending = Future()
+        threading.Thread(target=self._load, args=(future, model_path), name="model-reload", daemon=True).start()
+        return future
+
+    def watch(self, interval=5.0):
+        """Poll mtime file model + config.json, reload kalau berubah dan sudah stabil"""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name="model-watcher", daemon=True)
+            self._watcher.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {
+            "model": self.backend.model_path,
+            "backend": self.backend.name,
+            "generation": self.generation,
+            "loaded_at": self.loaded_at,
+            "loading": self.loading,
+            "last_error": self.last_error,
+        }
+
+    def _target_path(self):
+        return resolve_model_path(self.model_key, ConfigManager.load_config(self.config_path) or {})
+
+    def _load(self, future, model_path):
+        try:
+            config = ConfigManager.load_config(self.config_path) or {}
+            candidate = smoke_test(create_backend(self.model_key, config, model_path), self.warmup_iterations)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self.backend = candidate
+            self.generation += 1
+            self.loaded_at = time.time()
+            self.last_error = None
+            self._signature = file_signature(candidate.model_path)
+        future.set_result(candidate)
+
+    def _watch(self, interval):
+        previous = None
+        while not self._stop.wait(interval):
+            try:
+                signature = file_signature(self._target_path())
+            except Exception:
+                continue
+            # File yang masih ditulis (copy / training) ditunggu sampai satu poll tanpa perubahan
+            stable = signature == previous
+            previous = signature
+            if signature is None or not stable or signature == self._signature or self.loading:
+                continue
+            future = self.reload(signature[0])
+            if future.exception() is not None:
+                # Jangan retry file rusak yang sama terus-menerus
+                self._signature = signature
+
+
+def current_rss_mb():
+    """Resident memory proses ini saat ini dalam MB (None kalau tidak tersedia)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def _import_runtime(model_path):
+    """Import framework lebih dulu supaya biayanya tidak dihitung sebagai footprint model"""
+    if model_path.endswith(".tflite"):
+        import_tflite_interpreter()
+    else:
+        import ultralytics  # noqa: F401
+
+
+class ModelRegistry:
+    """Model per key (config.json "models") di-load saat diminta, LRU eviction sesuai budget memori
+
+    Footprint model = kenaikan RSS saat load + warmup (minimal ukuran file); load pertama
+    per framework ikut menanggung inisialisasi runtime-nya (torch ~200 MB). Model pinned
+    (model utama app / server) ikut dihitung tapi tidak pernah di-evict. Memori model yang
+    di-evict baru bebas setelah request yang masih memakainya selesai
+    """
+
+    def __init__(self, config=None, budget_mb=0, warmup_iterations=1):
+        self.config = config if config is not None else (ConfigManager.load_config() or {})
+        self.budget_mb = float(budget_mb)
+        self.warmup_iterations = warmup_iterations
+        self.loads = 0
+        self.evictions = 0
+        self._models = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        # Load satu per satu: selisih RSS hanya milik model yang sedang di-load
+        self._load_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Registry dengan budget performance.model_memory_budget_mb (0 = tanpa batas)"""
+        performance = (config or {}).get("performance", {})
+        return cls(
+            config,
+            budget_mb=float(performance.get("model_memory_budget_mb", 0)),
+            warmup_iterations=performance.get("warmup_iterations", 1),
+        )
+
+    def available(self):
+        """Key model di config.json yang file-nya ada"""
+        keys = []
+        for key in self.config.get("models", {}):
+            path = ConfigManager.get_model_path(key, self.config)
+            if path and os.path.exists(path):
+                keys.append(key)
+        return keys
+
+    def add(self, key, backend, pinned=True, footprint_mb=None):
+        """Daftarkan model yang sudah di-load di luar registry (mis. model utama)"""
+        if footprint_mb is None:
+            footprint_mb = os.path.getsize(backend.model_path) / (1024 * 1024)
+        with self._lock:
+            self._models[key] = self._entry(backend, footprint_mb, pinned)
+        return backend
+
+    def get(self, key):
+        """Backend untuk key, load (dan evict model lain kalau perlu) kalau belum ada"""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                entry["hits"] += 1
+                return entry["backend"]
+            # Session lain sedang me-load key yang sama, tunggu hasilnya
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            backend = self._load(key)
+            future.set_result(backend)
+            return backend
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+    def pin(self, key):
+        """get() lalu tandai pinned, untuk model yang dipakai terus (mis. tahap pertama cascade)"""
+        backend = self.get(key)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                entry["pinned"] = True
+        return backend
+
+    def evict(self, key):
+        with self._lock:
+            entry = self._models.pop(key, None)
+            if entry is not None:
+                self.evictions += 1
+        return entry is not None
+
+    def used_mb(self):
+        with self._lock:
+            return sum(entry["footprint_mb"] for entry in self._models.values())
+
+    def stats(self):
+        with self._lock:
+            models = [
+                {
+                    "key": key,
+                    "backend": entry["backend"].name,
+                    "model": entry["backend"].model_path,
+                    "footprint_mb": round(entry["footprint_mb"], 1),
+                    "hits": entry["hits"],
+                    "pinned": entry["pinned"],
+                }
+                for key, entry in self._models.items()
+            ]
+        rss = current_rss_mb()
+        return {
+            "budget_mb": self.budget_mb,
+            "used_mb": round(sum(model["footprint_mb"] for model in models), 1),
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "models": models,
+        }
+
+    def _entry(self, backend, footprint_mb, pinned):
+        return {"backend": backend, "footprint_mb": footprint_mb, "pinned": pinned, "hits": 1, "loaded_at": time.time()}
+
+    def _load(self, key):
+        path = ConfigManager.get_model_path(key, self.config)
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Model '{key}' ({path}) tidak ditemukan!")
+        file_mb = os.path.getsize(path) / (1024 * 1024)
+
+        with self._load_lock:
+            # Perkiraan sebelum load: ukuran file, cukup untuk memutuskan eviction awal
+            self._make_room(file_mb)
+            _import_runtime(path)
+            gc.collect()
+            before = current_rss_mb()
+            backend = warmup(create_backend(key, self.config, path), self.warmup_iterations)
+            after = current_rss_mb()
+
+        footprint = file_mb
+        if before is not None and after is not None:
+            footprint = max(footprint, after - before)
+        with self._lock:
+            self._models[key] = self._entry(backend, footprint, pinned=False)
+            self.loads += 1
+        # Footprint sebenarnya bisa lebih besar dari perkiraan
+        self._make_room(0, keep=key)
+        return backend
+
+    def _make_room(self, needed_mb, keep=None):
+        """Evict model LRU (bukan pinned / keep) sampai used + needed <= budget"""
+        if self.budget_mb <= 0:
+            return
+        evicted = False
+        with self._lock:
+            candidates = [key for key, entry in self._models.items() if not entry["pinned"] and key != keep]
+            used = sum(entry["footprint_mb"] for entry in self._models.values())
+            while candidates and used + needed_mb > self.budget_mb:
+                entry = self._models.pop(candidates.pop(0))
+                used -= entry["footprint_mb"]
+                self.evictions += 1
+                evicted = True
+        if evicted:
+            gc.collect()
+
+
+# Export registry
+__all__ = [
+    'ModelRegistry',
+    'ReloadableBackend',
+    'current_rss_mb',
+    'file_signature',
+    'smoke_test'
+]
@@ -0,0 +1,205 @@
+"""
+Annotated rendering untuk YOLO BISINDO Predictor
+Overlay huruf + confidence (+ box ROI) di atas gambar / frame video; annotate, encode
+dan tulis file berjalan di thread terpisah supaya tidak menahan inference
+"""
+
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ingest import decode_image
+from metrics import METRICS
+from utils import ColorPalette, ImageUtils
+
+# Codec dicoba berurutan: H.264 (bisa diputar browser) kalau tersedia, fallback MPEG-4
+VIDEO_CODECS = ("avc1", "mp4v")
+
+# Batas resolusi output video, frame lebih besar di-resize (ukuran file dan waktu encode)
+MAX_VIDEO_SIZE = (1280, 720)
+
+# Satu thread encoder gambar untuk seluruh proses
+_image_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-encoder")
+
+# Codec hasil probe pertama (None = belum di-probe)
+_video_codec = None
+_codec_lock = threading.Lock()
+
+
+def annotate(image, label, confidence, box=None, threshold=0.5):
+    """Copy gambar RGB dengan label + confidence di pojok kiri atas dan (opsional) box ROI
+
+    Hijau kalau confidence >= threshold, oranye kalau di bawahnya
+    """
+    import cv2
+
+    out = image.copy()
+    # ColorPalette dalam BGR, gambar di pipeline ini RGB
+    color = ColorPalette.get_color("green" if confidence >= threshold else "orange")[::-1]
+    scale = max(0.6, min(out.shape[:2]) / 400)
+    if box is not None:
+        ImageUtils.draw_box(out, *[int(v) for v in box], color=color, thickness=max(2, int(scale * 2)))
+
+    text = f"{label} {confidence * 100:.1f}%"
+    (width, height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, 2)
+    # Latar gelap supaya teks terbaca di frame terang
+    cv2.rectangle(out, (0, 0), (width + 20, height + baseline + 20), (0, 0, 0), -1)
+    ImageUtils.draw_text(out, text, (10, height + 10), font_scale=scale, color=color)
+    return out
+
+
+def encode_image(image, ext=".jpg", quality=90):
+    """Encode gambar RGB ke bytes (.jpg / .png)"""
+    import cv2
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext in (".jpg", ".jpeg") else []
+    ok, data = cv2.imencode(ext, cv2.cvtColor(image, cv2.COLOR_RGB2BGR), params)
+    if not ok:
+        raise ValueError(f"Encode {ext} gagal")
+    return data.tobytes()
+
+
+def _render_image(data, label, confidence, box, box_shape, threshold):
+    with METRICS.time("encode"):
+        image = decode_image(data)
+        if box is not None and box_shape is not None:
+            # Box dihitung di gambar hasil decode kecil, skalakan ke resolusi penuh
+            sy, sx = image.shape[0] / box_shape[0], image.shape[1] / box_shape[1]
+            box = (box[0] * sx, box[1] * sy, box[2] * sx, box[3] * sy)
+        return encode_image(annotate(image, label, confidence, box, threshold))
+
+
+def render_image_async(data, label, confidence, box=None, box_shape=None, threshold=0.5):
+    """Decode resolusi penuh + annotate + encode JPEG di thread encoder, return Future berisi bytes
+
+    box_shape: (height, width) gambar tempat box dihitung, kalau berbeda dari resolusi penuh
+    """
+    return _image_executor.submit(_render_image, data, label, confidence, box, box_shape, threshold)
+
+
+def video_codec():
+    """Codec pertama di VIDEO_CODECS yang bisa dipakai build OpenCV ini, di-probe sekali per process
+
+    Probe dengan log OpenCV dimatikan: codec yang tidak ada (mis. avc1 di opencv-python)
+    mencetak [ERROR] FFMPEG setiap kali VideoWriter gagal dibuka
+    """
+    global _video_codec
+    with _codec_lock:
+        if _video_codec is None:
+            import cv2
+
+            level = cv2.getLogLevel()
+            cv2.setLogLevel(0)
+            try:
+                with tempfile.TemporaryDirectory() as directory:
+                    path = os.path.join(directory, "probe.mp4")
+                    for codec in VIDEO_CODECS:
+                        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), 10, (64, 64))
+                        opened = writer.isOpened()
+                        writer.release()
+                        if opened:
+                            _video_codec = codec
+                            break
+            finally:
+                cv2.setLogLevel(level)
+            if _video_codec is None:
+                raise IOError(f"Tidak ada codec video yang tersedia ({', '.join(VIDEO_CODECS)})")
+        return _video_codec
+
+
+def open_video_writer(path, fps, size):
+    """cv2.VideoWriter dengan codec dari video_codec()"""
+    import cv2
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*video_codec()), fps, size)
+    if not writer.isOpened():
+        writer.release()
+        raise IOError(f"VideoWriter {path} gagal dibuka")
+    return writer
+
+
+class AsyncVideoWriter:
+    """Tulis video beranotasi dari thread encoder, langsung ke file (tidak ditampung di memory)
+
+    write() hanya memasukkan frame ke queue terbatas; kalau encoder tertinggal queue_size
+    frame, write() menunggu (frame video tidak boleh di-drop)
+    """
+
+    def __init__(self, path, fps, threshold=0.5, queue_size=64):
+        self.path = path
+        self.fps = fps
+        self.threshold = threshold
+        self.written = 0
+        self.error = None
+        self._closed = False
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="video-encoder", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, label, confidence, box=None):
+        if self.error is not None:
+            raise self.error
+        self._queue.put((frame, label, confidence, box))
+
+    def close(self, raise_error=True):
+        """Tunggu semua frame ditulis, return path file video (aman dipanggil lebih dari sekali)"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        if raise_error and self.error is not None:
+            raise self.error
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        import cv2
+
+        writer = None
+        size = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                frame, label, confidence, box = item
+                with METRICS.time("encode"):
+                    if size is None:
+                        height, width = ImageUtils.resize_image(frame, *MAX_VIDEO_SIZE).shape[:2]
+                        # H.264 butuh dimensi genap
+                        size = (width - width % 2, height - height % 2)
+                        writer = open_video_writer(self.path, self.fps, size)
+                    if box is not None:
+                        sx, sy = size[0] / frame.shape[1], size[1] / frame.shape[0]
+                        box = (box[0] * sx, box[1] * sy, box[2] * sx, box[3] * sy)
+                    if frame.shape[1::-1] != size:
+                        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                    image = annotate(frame, label, confidence, box, self.threshold)
+                    writer.write(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+                self.written += 1
+        except Exception as e:
+            self.error = e
+            # Kosongkan queue supaya write() yang sedang menunggu tidak block selamanya
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if writer is not None:
+                writer.release()
+
+
+# Export render
+__all__ = [
+    'AsyncVideoWriter',
+    'annotate',
+    'encode_image',
+    'open_video_writer',
+    'render_image_async',
+    'video_codec'
+]
@@ -0,0 +1,127 @@
+"""
+Hand region-of-interest untuk YOLO BISINDO Predictor
+Cari area tangan dengan detector murah (warna kulit YCrCb, opsional gerakan antar frame)
+di versi kecil frame, crop persegi dengan padding, lalu crop itu yang diklasifikasi
+"""
+
+import numpy as np
+
+# Rentang kulit di ruang YCrCb (Cr 133-173, Cb 77-127), cukup stabil untuk berbagai warna kulit
+SKIN_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+SKIN_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+
+
+class HandROI:
+    """Deteksi + crop ROI tangan; state gerakan disimpan per instance (satu per stream)"""
+
+    def __init__(self, padding=0.2, min_area=0.01, work_size=160, use_motion=False, motion_threshold=25):
+        self.padding = padding
+        self.min_area = min_area
+        self.work_size = work_size
+        self.use_motion = use_motion
+        self.motion_threshold = motion_threshold
+        self.found = 0
+        self.missed = 0
+        self._previous = None
+
+    @classmethod
+    def from_config(cls, config, enabled=None, motion=False):
+        """ROI dari config.json "roi", None kalau dimatikan
+
+        enabled menimpa roi.enabled (toggle di UI), motion hanya berguna untuk stream
+        """
+        roi_config = (config or {}).get("roi", {})
+        if not (roi_config.get("enabled", False) if enabled is None else enabled):
+            return None
+        return cls(
+            padding=float(roi_config.get("padding", 0.2)),
+            min_area=float(roi_config.get("min_area", 0.01)),
+            work_size=int(roi_config.get("work_size", 160)),
+            use_motion=motion and roi_config.get("motion", True),
+        )
+
+    def min_side(self, imgsz):
+        """Resolusi decode minimum: crop tangan tetap >= imgsz walau hanya sebagian frame"""
+        return imgsz * 2
+
+    def detect(self, image):
+        """Bounding box (x1, y1, x2, y2) blob kulit terbesar dalam pixel image, None kalau tidak ada"""
+        import cv2
+
+        height, width = image.shape[:2]
+        scale = min(1.0, self.work_size / max(height, width))
+        small = image
+        if scale < 1.0:
+            small = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+
+        mask = cv2.inRange(cv2.cvtColor(small, cv2.COLOR_RGB2YCrCb), SKIN_LOWER, SKIN_UPPER)
+        if self.use_motion:
+            mask = self._gate_motion(small, mask)
+
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+
+        contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+        if not contours:
+            return None
+        largest = max(contours, key=cv2.contourArea)
+        if cv2.contourArea(largest) < self.min_area * mask.shape[0] * mask.shape[1]:
+            return None
+
+        x, y, w, h = cv2.boundingRect(largest)
+        return (int(x / scale), int(y / scale), int((x + w) / scale), int((y + h) / scale))
+
+    def crop(self, image, box):
+        """Crop persegi di sekitar box + padding; bagian di luar frame diisi replikasi tepi
+
+        Return (crop, box_persegi_yang_terpotong_ke_frame)
+        """
+        import cv2
+
+        height, width = image.shape[:2]
+        x1, y1, x2, y2 = box
+        side = int(max(x2 - x1, y2 - y1) * (1 + 2 * self.padding))
+        left = (x1 + x2) // 2 - side // 2
+        top = (y1 + y2) // 2 - side // 2
+        right, bottom = left + side, top + side
+
+        clipped = (max(left, 0), max(top, 0), min(right, width), min(bottom, height))
+        crop = image[clipped[1]:clipped[3], clipped[0]:clipped[2]]
+        pads = (clipped[1] - top, bottom - clipped[3], clipped[0] - left, right - clipped[2])
+        if any(pads):
+            crop = cv2.copyMakeBorder(crop, *pads, cv2.BORDER_REPLICATE)
+        return crop, clipped
+
+    def apply(self, image):
+        """Return (input untuk model, box) - seluruh frame dan None kalau tangan tidak ditemukan"""
+        box = self.detect(image)
+        if box is None:
+            self.missed += 1
+            return image, None
+        self.found += 1
+        return self.crop(image, box)
+
+    def _gate_motion(self, small, skin_mask):
+        """Kulit yang bergerak (tangan) diutamakan daripada kulit diam (wajah)"""
+        import cv2
+
+        gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+        previous, self._previous = self._previous, gray
+        if previous is None or previous.shape != gray.shape:
+            return skin_mask
+
+        motion = cv2.threshold(cv2.absdiff(gray, previous), self.motion_threshold, 255, cv2.THRESH_BINARY)[1]
+        motion = cv2.dilate(motion, None, iterations=3)
+        moving_skin = cv2.bitwise_and(skin_mask, motion)
+        # Tangan diam (huruf ditahan): tidak ada kulit bergerak, pakai mask kulit saja
+        if cv2.countNonZero(moving_skin) < self.min_area * gray.size:
+            return skin_mask
+        return moving_skin
+
+
+# Export roi
+__all__ = [
+    'HandROI'
+]
@@ -0,0 +1,334 @@
+"""
+Headless HTTP inference service untuk YOLO BISINDO Predictor
+Jalankan tanpa Streamlit: python server.py --port 8000
+
+Endpoints:
+    GET  /health          status model
+    GET  /metrics         latency per stage (format text Prometheus)
+    POST /reload          load ulang model dari config.json lalu swap tanpa restart
+    POST /predict         body = bytes gambar (jpg/png/bmp)
+    POST /predict/batch   body = JSON {"images": [base64, ...]} atau
+                          application/octet-stream (frame: uint32 big-endian panjang + bytes)
+
+Tambahkan ?format=bin (atau header Accept: application/octet-stream) untuk
+response binary: float32 little-endian (N, num_classes), shape di header X-Shape.
+?model=<key> memakai varian lain dari config.json "models" (di-load saat diminta),
+?model=cascade memakai cascade model cepat -> model utama (config.json "cascade")
+"""
+
+import argparse
+import base64
+import json
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from backends import create_backend, top_k, warmup
+from batching import MicroBatcher, decode_images
+from cascade import CascadeBackend
+from ingest import decode_image
+from metrics import METRICS
+from registry import ModelRegistry, ReloadableBackend
+from utils import ConfigManager, ResultLogger, ValidationUtils
+
+MAX_BODY_BYTES = ValidationUtils.MAX_FILE_SIZE_MB * 1024 * 1024
+
+
+def split_frames(body):
+    """Pecah body length-prefixed (uint32 big-endian + bytes) menjadi list bytes"""
+    frames = []
+    offset = 0
+    view = memoryview(body)
+    while offset < len(body):
+        if offset + 4 > len(body):
+            raise ValueError("Frame header terpotong")
+        (length,) = struct.unpack_from(">I", body, offset)
+        offset += 4
+        if offset + length > len(body):
+            raise ValueError("Frame body terpotong")
+        frames.append(view[offset:offset + length].tobytes())
+        offset += length
+    return frames
+
+
+def format_prediction(backend, probs, k=3):
+    """Vector probabilitas -> dict JSON (label, confidence, top-k)"""
+    top = top_k(probs, k)
+    return {
+        "class_id": int(top[0]),
+        "label": backend.names[top[0]],
+        "confidence": float(probs[top[0]]),
+        "top": [{"label": backend.names[idx], "confidence": float(probs[idx])} for idx in top],
+    }
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """Request handler, backend diambil dari self.server.backend"""
+
+    server_version = "BisindoInference/1.0"
+    protocol_version = "HTTP/1.1"
+    _body_pending = False
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ----- helpers -----
+
+    def _wants_binary(self):
+        query = parse_qs(urlparse(self.path).query)
+        if query.get("format", [""])[0] == "bin":
+            return True
+        return "application/octet-stream" in self.headers.get("Accept", "")
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if self._body_pending:
+            # Body request belum dibaca: sisanya akan terbaca sebagai request berikutnya di koneksi keep-alive
+            self.close_connection = True
+            self.send_header("Connection", "close")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data, headers=None):
+        self._send(status, json.dumps(data).encode("utf-8"), "application/json", headers)
+
+    def _backend(self):
+        """Model untuk request ini: ?model=<key> dari registry, default model utama"""
+        key = parse_qs(urlparse(self.path).query).get("model", [""])[0]
+        if not key or key == self.server.model_key:
+            return self.server.backend
+        if key == "cascade":
+            return self._cascade()
+        return self.server.registry.get(key)
+
+    def _cascade(self):
+        """Cascade dibuat saat pertama diminta: model cepat tidak di-load (dan runtime TFLite
+        tidak dibutuhkan) selama tidak ada request ?model=cascade"""
+        server = self.server
+        cascade_config = server.config.get("cascade", {})
+        if not cascade_config.get("enabled", False):
+            raise FileNotFoundError("Cascade tidak aktif (cascade.enabled)")
+        with server.cascade_lock:
+            if server.cascade is None:
+                fast_key = cascade_config.get("fast_model", "tflite_float16")
+                try:
+                    fast = server.registry.pin(fast_key)
+                except Exception as e:
+                    raise FileNotFoundError(f"Cascade tidak tersedia, model cepat '{fast_key}' gagal di-load: {e}")
+                server.cascade = CascadeBackend.from_config(server.config, fast, server.backend)
+        return server.cascade
+
+    def _send_probs(self, backend, probs, elapsed, single):
+        headers = {"X-Inference-Ms": f"{elapsed * 1000:.3f}"}
+
+        if self._wants_binary():
+            with METRICS.time("postprocess"):
+                probs = np.ascontiguousarray(probs, dtype="<f4")
+                headers["X-Shape"] = f"{probs.shape[0]},{probs.shape[1]}"
+            if self.server.result_logger:
+                self._log([format_prediction(backend, row) for row in probs], elapsed)
+            with METRICS.time("render"):
+                self._send(200, probs.tobytes(), "application/octet-stream", headers)
+            return
+
+        with METRICS.time("postprocess"):
+            predictions = [format_prediction(backend, row) for row in probs]
+        self._log(predictions, elapsed)
+        with METRICS.time("render"):
+            if single:
+                self._send_json(200, predictions[0], headers)
+            else:
+                self._send_json(200, {"predictions": predictions}, headers)
+
+    def _log(self, predictions, elapsed):
+        logger = self.server.result_logger
+        if not logger:
+            return
+        latency_ms = round(elapsed * 1000 / len(predictions), 3)
+        for index, prediction in enumerate(predictions):
+            logger.log_prediction(
+                f"{self.path}#{index}", [[item["label"], item["confidence"]] for item in prediction["top"]],
+                source="server", client=self.client_address[0], latency_ms=latency_ms,
+            )
+
+    def _begin_request(self):
+        """Tandai apakah request membawa body yang belum dibaca (satu handler per koneksi)"""
+        self._body_pending = (self.headers.get("Content-Length", "0").strip() != "0"
+                              or "Transfer-Encoding" in self.headers)
+
+    def _read_body(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise ValueError("Content-Length tidak valid")
+        if length <= 0:
+            raise ValueError("Body kosong")
+        if length > MAX_BODY_BYTES:
+            raise OverflowError(f"Body melebihi {ValidationUtils.MAX_FILE_SIZE_MB}MB")
+        body = self.rfile.read(length)
+        self._body_pending = False
+        return body
+
+    # ----- endpoints -----
+
+    def do_GET(self):
+        self._begin_request()
+        path = urlparse(self.path).path
+        if path == "/health":
+            backend = self.server.backend
+            self._send_json(200, {
+                "status": "ok",
+                "backend": backend.name,
+                "model": backend.model_path,
+                "version": backend.version,
+                "num_classes": backend.num_classes,
+                "imgsz": backend.imgsz,
+                "reload": backend.status() if hasattr(backend, "reload") else None,
+                "registry": self.server.registry.stats(),
+                "cascade": self.server.cascade.stats() if self.server.cascade else None,
+            })
+        elif path == "/metrics":
+            self._send(200, METRICS.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        self._begin_request()
+        if urlparse(self.path).path == "/reload":
+            # Bukan request inference, tidak ikut histogram latency
+            self._reload()
+            return
+        start = time.perf_counter()
+        try:
+            self._handle_post()
+        finally:
+            # End-to-end termasuk antre di micro-batcher
+            METRICS.observe("request", time.perf_counter() - start)
+
+    def _handle_post(self):
+        path = urlparse(self.path).path
+        try:
+            body = self._read_body()
+            if path not in ("/predict", "/predict/batch"):
+                self._send_json(404, {"error": "Not found"})
+                return
+            backend = self._backend()
+            if path == "/predict":
+                images = [decode_image(body, backend.imgsz)]
+            else:
+                images = self._decode_batch(body, backend.imgsz)
+        except FileNotFoundError as e:
+            # ?model=<key> tidak ada di config.json / file model tidak ditemukan
+            self._send_json(404, {"error": str(e)})
+            return
+        except OverflowError as e:
+            self._send_json(413, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            start = time.perf_counter()
+            probs = backend.predict(images)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        self._send_probs(backend, probs, elapsed, single=(path == "/predict"))
+
+    def _reload(self):
+        """Reload model dari config.json (bukan path dari request), tunggu sampai swap selesai"""
+        backend = self.server.backend
+        if not hasattr(backend, "reload"):
+            self._send_json(409, {"error": "Hot reload tidak aktif (performance.hot_reload)"})
+            return
+        try:
+            backend.reload().result()
+        except Exception as e:
+            self._send_json(500, {"error": f"Reload gagal, model lama tetap dipakai: {e}", **backend.status()})
+            return
+        self._send_json(200, backend.status())
+
+    def _decode_batch(self, body, imgsz):
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/json"):
+            payload = json.loads(body)
+            if not isinstance(payload, dict) or not isinstance(payload.get("images"), list):
+                raise ValueError("Body JSON harus berisi list 'images' (base64)")
+            blobs = [base64.b64decode(item) for item in payload["images"]]
+        else:
+            blobs = split_frames(body)
+        if not blobs:
+            raise ValueError("Batch kosong")
+
+        images = []
+        for index, (image, error) in enumerate(decode_images(blobs, min_side=imgsz)):
+            if error is not None:
+                raise ValueError(f"Gambar #{index} gagal dibaca: {error}")
+            images.append(image)
+        return images
+
+
+def create_server(host="0.0.0.0", port=8000, backend=None, verbose=False, model_key=None, config=None):
+    """Buat ThreadingHTTPServer dengan backend yang sama seperti load_model() di app
+
+    config default dari config.json
+    """
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    server.daemon_threads = True
+    if config is None:
+        config = ConfigManager.load_config()
+    # Model bisa diganti saat berjalan, request paralel digabung menjadi micro-batch
+    backend = ReloadableBackend.from_config(backend or create_backend(model_key, config), config, model_key)
+    server.backend = MicroBatcher.from_config(backend, config)
+    # Varian lain (?model=<key>) di-load saat diminta dengan budget memori
+    server.model_key = model_key or (config or {}).get("performance", {}).get("model", "detection")
+    server.registry = ModelRegistry.from_config(config)
+    server.registry.add(server.model_key, server.backend, pinned=True)
+    server.config = config or {}
+    # Cascade (?model=cascade) dibuat saat request pertama, lihat InferenceHandler._cascade
+    server.cascade = None
+    server.cascade_lock = threading.Lock()
+    server.result_logger = ResultLogger.from_config(config)
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO BISINDO headless inference server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=None, help="Key model di config.json (default: performance.model)")
+    parser.add_argument("--verbose", action="store_true", help="Log setiap request")
+    args = parser.parse_args()
+
+    config = ConfigManager.load_config() or {}
+    start = time.perf_counter()
+    # Warmup sebelum listen, request pertama tidak menanggung inisialisasi lazy
+    backend = warmup(create_backend(args.model, config), config.get("performance", {}).get("warmup_iterations", 1))
+    print(f"⏱️ Model siap dalam {time.perf_counter() - start:.2f}s")
+
+    server = create_server(args.host, args.port, backend, args.verbose, args.model, config)
+    backend = server.backend
+    print(f"🚀 Inference server ({backend.name}: {backend.model_path}) di http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
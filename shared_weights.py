@@ -0,0 +1,120 @@
+"""
+Shared model weights untuk YOLO BISINDO Predictor
+Weights best.pt di-load sekali, di-fuse, lalu ditulis ke /dev/shm sebagai file tensor
+yang di-mmap oleh setiap worker. Page weights dipakai bersama oleh semua process
+(mapping private copy-on-write, inference tidak pernah menulis ke weights)
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from registry import current_rss_mb
+
+# Lokasi file weights: tmpfs kalau ada, selain itu temp dir biasa (tetap dibagi lewat page cache)
+SHARED_DIRS = ("/dev/shm",)
+
+
+def _shared_root():
+    for path in SHARED_DIRS:
+        if os.path.isdir(path) and os.access(path, os.W_OK):
+            return path
+    return tempfile.gettempdir()
+
+
+def _publish(model_path, directory):
+    """Load + fuse model, tulis skeleton (arsitektur tanpa tensor) dan weights terpisah"""
+    import torch
+    from ultralytics import YOLO
+
+    model = YOLO(model_path)
+    network = model.model.fuse(verbose=False).eval()
+    # Tensor contiguous: torch.load(mmap=True) memetakan storage langsung dari file
+    state = {name: tensor.contiguous() for name, tensor in network.state_dict().items()}
+    weights = os.path.join(directory, "weights.pt")
+    torch.save(state, weights)
+    size = sum(tensor.numel() * tensor.element_size() for tensor in state.values())
+
+    # Skeleton tetap checkpoint ultralytics (names, train_args, ...), parameter di device meta
+    checkpoint = {key: value for key, value in model.ckpt.items() if key not in ("optimizer", "ema")}
+    checkpoint["model"] = network.to("meta")
+    skeleton = os.path.join(directory, "skeleton.pt")
+    torch.save(checkpoint, skeleton)
+
+    for path in (weights, skeleton):
+        os.chmod(path, 0o444)
+    return {"weights": weights, "skeleton": skeleton, "size_mb": size / (1024 * 1024)}
+
+
+def publish_weights(model_path, directory=None):
+    """Tulis weights model .pt ke storage bersama, return handle (dict, bisa di-pickle ke worker)
+
+    Load dilakukan di process sementara supaya process pemanggil tidak ikut memuat torch
+    """
+    if not model_path.endswith(".pt"):
+        raise ValueError(f"{model_path}: shared weights hanya untuk model PyTorch (.pt)")
+    directory = tempfile.mkdtemp(prefix="bisindo-weights-", dir=directory or _shared_root())
+    start = time.perf_counter()
+    try:
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(1) as pool:
+            handle = pool.apply(_publish, (os.path.abspath(model_path), directory))
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    handle.update({"model_path": model_path, "directory": directory, "publish_s": time.perf_counter() - start})
+    return handle
+
+
+def release_weights(handle):
+    """Hapus file weights; worker yang sudah attach tetap bisa memakai mapping-nya"""
+    if handle:
+        shutil.rmtree(handle["directory"], ignore_errors=True)
+
+
+def load_shared_model(handle):
+    """YOLO dari skeleton + weights hasil mmap (tanpa copy weights ke memory process ini)"""
+    import torch
+    from ultralytics import YOLO
+
+    model = YOLO(handle["skeleton"])
+    state = torch.load(handle["weights"], mmap=True, weights_only=True)
+    # assign=True: parameter memakai tensor mmap apa adanya, bukan copy ke tensor baru
+    model.model.load_state_dict(state, assign=True)
+    # Overrides dari skeleton menunjuk ke file sementara, kembalikan ke model asli
+    model.overrides["model"] = model.ckpt_path = handle["model_path"]
+    return model
+
+
+def memory_usage():
+    """RSS, PSS dan bagian shared process ini dalam MB (dari /proc/self/smaps_rollup)
+
+    RSS menghitung page bersama penuh di setiap process; PSS membaginya dengan jumlah
+    process yang memakainya, jadi jumlah PSS semua worker = memory sebenarnya
+    """
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        rss = current_rss_mb()
+        return {"rss_mb": rss, "pss_mb": None, "shared_mb": None}
+    return {
+        "rss_mb": fields.get("Rss"),
+        "pss_mb": fields.get("Pss"),
+        "shared_mb": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+    }
+
+
+# Export shared_weights
+__all__ = [
+    'load_shared_model',
+    'memory_usage',
+    'publish_weights',
+    'release_weights'
+]
@@ -0,0 +1,284 @@
+"""
+Real-time streaming pipeline untuk tab Webcam dan Phone
+Frame dari browser -> FrameSlot (latest-frame-wins) -> worker thread -> hasil terbaru ke halaman
+"""
+
+import base64
+import os
+import threading
+import time
+
+import numpy as np
+import streamlit.components.v1 as components
+
+from backends import top_k
+from ingest import decode_image
+from metrics import METRICS
+from utils import ImageUtils
+
+COMPONENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "camera_stream")
+
+_camera_component = components.declare_component("camera_stream", path=COMPONENT_DIR)
+
+# Batas tunggu hasil frame sebelum rerun selesai, di bawah ACK_TIMEOUT_MS browser (2 s)
+RESULT_TIMEOUT_S = 1.5
+
+
+def decode_data_url(data_url, min_side=None):
+    """Decode data URL (data:image/jpeg;base64,...) ke numpy array RGB"""
+    _, _, payload = data_url.partition(",")
+    return decode_image(base64.b64decode(payload), min_side)
+
+
+class FrameSlot:
+    """Queue satu slot: frame baru menimpa frame lama yang belum diproses"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self.dropped = 0
+
+    def put(self, item):
+        """Simpan frame terbaru, frame lama yang belum diambil dihitung sebagai drop"""
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Ambil frame terbaru, return None kalau timeout"""
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def depth(self):
+        """Jumlah frame yang menunggu (0 atau 1)"""
+        with self._cond:
+            return 0 if self._item is None else 1
+
+
+class MotionGate:
+    """Gating murah sebelum inference: frame yang hampir sama dengan frame terakhir
+    yang di-infer memakai ulang prediksi sebelumnya
+
+    Perbedaan = rata-rata selisih absolut thumbnail grayscale (0..1). Referensi
+    hanya diganti saat inference jalan, jadi perubahan pelan tetap terakumulasi
+    """
+
+    def __init__(self, threshold=0.03, refresh_interval=1.0, size=32):
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+        self.size = size
+        self.checked = 0
+        self.skipped = 0
+        self._reference = None
+        self._reference_time = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        """Gate dari performance.motion_*, None kalau motion_threshold <= 0"""
+        performance = (config or {}).get("performance", {})
+        threshold = float(performance.get("motion_threshold", 0))
+        if threshold <= 0:
+            return None
+        return cls(threshold=threshold, refresh_interval=float(performance.get("motion_refresh_s", 1.0)))
+
+    def thumbnail(self, image):
+        """Crop yang sama dengan input model, diperkecil ke size x size grayscale float"""
+        return ImageUtils.fit_square(image, self.size).mean(axis=2, dtype=np.float32) / 255.0
+
+    def check(self, image, now=None):
+        """Return (perlu_inference, thumbnail, perubahan)"""
+        now = time.perf_counter() if now is None else now
+        thumb = self.thumbnail(image)
+        self.checked += 1
+
+        if self._reference is None or now - self._reference_time >= self.refresh_interval:
+            return True, thumb, 1.0
+        change = float(np.abs(thumb - self._reference).mean())
+        if change >= self.threshold:
+            return True, thumb, change
+
+        self.skipped += 1
+        return False, thumb, change
+
+    def accept(self, thumb, now=None):
+        """Jadikan thumbnail frame yang baru di-infer sebagai referensi"""
+        self._reference = thumb
+        self._reference_time = time.perf_counter() if now is None else now
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.checked if self.checked else 0.0
+
+
+class StreamWorker:
+    """Worker thread per stream, selalu memproses frame terbaru dari FrameSlot"""
+
+    def __init__(self, backend, idle_timeout=30.0, logger=None, gate=None, roi=None):
+        self.backend = backend
+        self.idle_timeout = idle_timeout
+        self.logger = logger
+        self.gate = gate
+        self.roi = roi
+        self.slot = FrameSlot()
+        self.processed = 0
+        self.inferred = 0
+        self._probs = None
+        self._box = None
+        self.fps = 0.0
+        self._result = None
+        self._last_key = None
+        self._last_done = None
+        self._done_key = None
+        self._done = threading.Condition()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, key, data_url):
+        """Masukkan frame (belum di-decode) ke slot
+
+        Frame dengan key yang sama (rerun tanpa frame baru) diabaikan
+        """
+        if key == self._last_key:
+            return False
+        self._last_key = key
+        self.slot.put((key, data_url, time.perf_counter()))
+        self._ensure_running()
+        return True
+
+    def latest(self):
+        """Hasil prediksi terbaru (dict) atau None"""
+        return self._result
+
+    def wait_result(self, key, timeout=RESULT_TIMEOUT_S):
+        """Tunggu frame `key` selesai diproses (atau digantikan frame lebih baru), return hasil terbaru
+
+        Dipanggil di rerun yang mengirim frame supaya hasilnya ikut terkirim bersama ack,
+        bukan baru muncul saat frame berikutnya
+        """
+        with self._done:
+            self._done.wait_for(lambda: self._done_key == key or self._last_key != key, timeout)
+        return self._result
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self.slot.get(timeout=self.idle_timeout)
+            if item is None:
+                # Idle: thread berhenti, submit() berikutnya menyalakan lagi
+                with self._lock:
+                    if self.slot.depth() == 0:
+                        self._thread = None
+                        return
+                continue
+
+            try:
+                self._process(*item)
+            except Exception as e:
+                self._result = {"frame_id": item[0][1], "error": str(e)}
+            with self._done:
+                self._done_key = item[0]
+                self._done.notify_all()
+
+    def _process(self, key, data_url, submitted_at):
+        roi = self.roi
+        image = decode_data_url(data_url, roi.min_side(self.backend.imgsz) if roi else self.backend.imgsz)
+
+        start = time.perf_counter()
+        infer, thumb = True, None
+        if self.gate is not None and self._probs is not None:
+            with METRICS.time("gate"):
+                infer, thumb, _ = self.gate.check(image, start)
+
+        if infer:
+            model_input, box = image, None
+            if roi is not None:
+                with METRICS.time("roi"):
+                    model_input, box = roi.apply(image)
+            probs = self.backend.predict_one(model_input)
+            self._probs = probs
+            # Box dikirim ternormalisasi (0..1) supaya bisa digambar di atas video ukuran apa pun
+            height, width = image.shape[:2]
+            self._box = [box[0] / width, box[1] / height, box[2] / width, box[3] / height] if box else None
+            self.inferred += 1
+            if self.gate is not None:
+                self.gate.accept(self.gate.thumbnail(image) if thumb is None else thumb)
+        else:
+            # Frame hampir sama dengan frame terakhir yang di-infer, pakai ulang hasilnya
+            probs = self._probs
+        done = time.perf_counter()
+
+        if self._last_done is not None and done > self._last_done:
+            # Exponential moving average supaya angka FPS stabil
+            self.fps = 0.8 * self.fps + 0.2 * (1.0 / (done - self._last_done))
+        self._last_done = done
+        self.processed += 1
+
+        with METRICS.time("postprocess"):
+            top = top_k(probs, 3)
+            self._result = {
+                "frame_id": key[1],
+                "label": self.backend.names[top[0]],
+                "confidence": float(probs[top[0]]),
+                "top3": [[self.backend.names[idx], float(probs[idx])] for idx in top],
+                "latency_ms": (done - start) * 1000,
+                "age_ms": (done - submitted_at) * 1000,
+                "fps": self.fps,
+                "processed": self.processed,
+                "dropped": self.slot.dropped,
+                # Frame yang sudah menunggu di slot; > 0 berarti browser mengirim lebih cepat dari worker
+                "queue_depth": self.slot.depth(),
+                "reused": not infer,
+                "box": self._box,
+                "skip_ratio": self.gate.skip_ratio if self.gate is not None else 0.0,
+            }
+        if self.logger:
+            self.logger.log_prediction(
+                f"{key[0]}#{key[1]}", self._result["top3"],
+                source="stream", latency_ms=round(self._result["latency_ms"], 3), reused=not infer,
+            )
+
+
+def capture_settings(config, min_side):
+    """Parameter capture untuk browser dari config.json "settings"
+
+    Frame di-downscale di browser sampai sisi pendek = min_side (resolusi decode model)
+    dan di-encode JPEG di sana, webcam_fps menjadi batas atas laju kirim
+    """
+    settings = (config or {}).get("settings", {})
+    width, height = settings.get("webcam_resolution", [640, 480])
+    return {
+        "width": int(width),
+        "height": int(height),
+        "fps": float(settings.get("webcam_fps", 30)),
+        "min_side": int(min_side),
+        "quality": float(settings.get("stream_jpeg_quality", 0.8)),
+    }
+
+
+def camera_stream(key, result=None, ack=None, facing_mode="user", capture=None):
+    """Render komponen kamera; return frame terakhir dari browser (dict) atau None"""
+    return _camera_component(
+        result=result, ack=ack, facing_mode=facing_mode, capture=capture or {}, key=key, default=None
+    )
+
+
+# Export streaming
+__all__ = [
+    'FrameSlot',
+    'MotionGate',
+    'RESULT_TIMEOUT_S',
+    'StreamWorker',
+    'camera_stream',
+    'capture_settings',
+    'decode_data_url'
+]
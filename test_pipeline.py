@@ -0,0 +1,761 @@
+"""
+Behaviour tests untuk pipeline inference YOLO BISINDO Predictor
+Tanpa model: backend palsu dan gambar synthetic, jalan dengan pytest atau langsung
+"""
+
+import io
+import json
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project to path
+project_dir = Path(__file__).parent
+sys.path.insert(0, str(project_dir))
+
+
+def section(title):
+    print("\n" + "=" * 50)
+    print(title)
+    print("=" * 50)
+
+
+class FakeBackend:
+    """Backend palsu: probs baris i = one-hot kelas (gambar % num_classes), gambar berupa int atau array (rata-rata pixel)"""
+
+    name = "fake"
+
+    def __init__(self, num_classes=4, delay=0.0, fail=False, short=False):
+        self.names = {idx: chr(ord("A") + idx) for idx in range(num_classes)}
+        self.delay = delay
+        self.fail = fail
+        self.short = short
+        self.calls = []
+        self.version = "fake:1"
+        self.model_path = "fake.pt"
+        self.imgsz = 8
+
+    @property
+    def num_classes(self):
+        return len(self.names)
+
+    def predict(self, batch):
+        self.calls.append(list(batch))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("backend gagal")
+        probs = np.zeros((len(batch), self.num_classes), dtype=np.float32)
+        for row, image in enumerate(batch):
+            probs[row, int(np.mean(image)) % self.num_classes] = 1.0
+        return probs[:-1] if self.short else probs
+
+    def predict_one(self, image):
+        return self.predict([image])[0]
+
+
+def test_micro_batcher_batching():
+    """Request bersamaan digabung jadi batch <= max_batch_size, hasil kembali ke pemiliknya"""
+    section("📦 MicroBatcher: batching")
+    from batching import MicroBatcher
+
+    backend = FakeBackend()
+    batcher = MicroBatcher(backend, max_batch_size=4, max_wait_ms=200)
+    futures = [batcher.submit(image) for image in range(10)]
+    results = [future.result(timeout=5) for future in futures]
+
+    sizes = [len(call) for call in backend.calls]
+    print(f"   Ukuran batch: {sizes}")
+    assert sizes == [4, 4, 2]
+    for image, probs in enumerate(results):
+        assert int(np.argmax(probs)) == image % backend.num_classes
+    assert batcher.stats()["items"] == 10
+    assert batcher.predict([1, 2]).shape == (2, backend.num_classes)
+
+
+def test_micro_batcher_max_wait():
+    """Request tunggal tidak menunggu lebih lama dari max_wait untuk teman batch"""
+    section("⏱️ MicroBatcher: max_wait")
+    from batching import MicroBatcher
+
+    backend = FakeBackend()
+    batcher = MicroBatcher(backend, max_batch_size=16, max_wait_ms=50)
+    start = time.perf_counter()
+    batcher.predict_one(3)
+    elapsed = time.perf_counter() - start
+    print(f"   Satu request: {elapsed * 1000:.1f} ms (max_wait 50 ms)")
+    assert 0.04 <= elapsed < 0.5
+    assert [len(call) for call in backend.calls] == [1]
+
+
+def test_micro_batcher_errors():
+    """Error backend sampai ke semua caller di batch, thread scheduler tetap hidup"""
+    section("❌ MicroBatcher: propagasi error")
+    from batching import MicroBatcher
+
+    backend = FakeBackend(fail=True)
+    batcher = MicroBatcher(backend, max_batch_size=8, max_wait_ms=50)
+    futures = [batcher.submit(image) for image in range(3)]
+    errors = [future.exception(timeout=5) for future in futures]
+    print(f"   Error: {[type(error).__name__ for error in errors]}")
+    assert all(isinstance(error, RuntimeError) for error in errors)
+
+    # Backend mengembalikan baris kurang dari jumlah gambar: tidak boleh ada future yang menggantung
+    backend.fail, backend.short = False, True
+    futures = [batcher.submit(image) for image in range(3)]
+    assert all(isinstance(future.exception(timeout=5), ValueError) for future in futures)
+
+    backend.short = False
+    assert int(np.argmax(batcher.predict_one(2))) == 2
+    assert batcher._thread.is_alive()
+
+
+def test_prediction_cache_lru_entries():
+    """Cache penuh membuang entry yang paling lama tidak dipakai"""
+    section("🗂️ PredictionCache: LRU per jumlah entry")
+    from cache import PredictionCache
+
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", [1.0, 0.0])
+    cache.put("b", [0.0, 1.0])
+    # get "a" menjadikannya paling baru, jadi "b" yang dibuang saat "c" masuk
+    assert cache.get("a") is not None
+    cache.put("c", [0.5, 0.5])
+    print(f"   Stats: {cache.stats()}")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_prediction_cache_lru_bytes():
+    """Total bytes tidak pernah melebihi max_bytes, entry lama dibuang lebih dulu"""
+    section("🗂️ PredictionCache: LRU per bytes")
+    from cache import PredictionCache
+
+    # 10 float32 = 40 bytes per entry, 100 bytes cukup untuk 2 entry
+    cache = PredictionCache(max_entries=100, max_bytes=100)
+    for key in "abcd":
+        cache.put(key, np.zeros(10))
+        assert cache.stats()["bytes"] <= 100
+    print(f"   Stats: {cache.stats()}")
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 80
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("d").dtype == np.float32
+
+    # Update key yang sama tidak menghitung bytes dua kali
+    cache.put("d", np.ones(10))
+    assert cache.stats()["bytes"] == 80
+    assert cache.get("d")[0] == 1.0
+
+
+def test_result_logger_rotation():
+    """File log dirotasi saat melewati max_bytes, backup lama dihapus sesuai backup_count"""
+    section("📝 ResultLogger: rotasi")
+    from utils import ResultLogger
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        logger = ResultLogger(log_dir=log_dir, max_bytes=200, backup_count=2)
+        try:
+            for index in range(10):
+                assert logger.log_prediction(f"img_{index}.jpg", [{"class": "A", "confidence": np.float32(0.9)}])
+                assert logger.flush()
+        finally:
+            logger.close()
+
+        backups = [name for name in os.listdir(log_dir) if name.startswith("predictions_")]
+        print(f"   Stats: {logger.stats()}, backup: {len(backups)}")
+        assert logger.written == 10 and logger.dropped == 0
+        assert logger.rotations >= 3
+        assert len(backups) <= 2
+
+
+def test_result_logger_drop_on_full():
+    """Queue penuh: log_prediction langsung return False, record dihitung di dropped"""
+    section("📝 ResultLogger: drop saat queue penuh")
+    from utils import ResultLogger
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        logger = ResultLogger(log_dir=log_dir, queue_size=2)
+        release = threading.Event()
+        write = logger._write
+
+        def blocked_write(records):
+            release.wait(5)
+            write(records)
+
+        # Writer tertahan di record pertama, queue terisi sisanya
+        logger._write = blocked_write
+        try:
+            assert logger.log_prediction("first.jpg", [])
+            deadline = time.perf_counter() + 5
+            while logger._queue.qsize() and time.perf_counter() < deadline:
+                time.sleep(0.01)
+            assert logger.log_prediction("second.jpg", [])
+            assert logger.log_prediction("third.jpg", [])
+
+            start = time.perf_counter()
+            assert not logger.log_prediction("dropped.jpg", [])
+            assert time.perf_counter() - start < 0.1
+            assert logger.dropped == 1
+        finally:
+            release.set()
+        assert logger.flush()
+        logger.close()
+
+        print(f"   Stats: {logger.stats()}")
+        assert logger.written == 3
+        with open(os.path.join(log_dir, ResultLogger.FILENAME), encoding="utf-8") as f:
+            filenames = [json.loads(line)["filename"] for line in f]
+        assert filenames == ["first.jpg", "second.jpg", "third.jpg"]
+
+
+def test_result_logger_age_rotation():
+    """Umur file log yang dibuka ulang dihitung dari record pertama, bukan dari mtime"""
+    section("📝 ResultLogger: rotasi umur setelah restart")
+    from datetime import datetime
+    from utils import ResultLogger
+
+    for age_s, rotated in ((2 * 3600, True), (60, False)):
+        with tempfile.TemporaryDirectory() as log_dir:
+            # File lama yang baru saja ditulis (mtime sekarang) tapi dimulai age_s detik lalu
+            started = datetime.fromtimestamp(time.time() - age_s).isoformat(timespec="milliseconds")
+            with open(os.path.join(log_dir, ResultLogger.FILENAME), "w", encoding="utf-8") as f:
+                f.write(json.dumps({"timestamp": started, "filename": "old.jpg", "predictions": []}) + "\n")
+
+            logger = ResultLogger(log_dir=log_dir, rotate_seconds=3600)
+            try:
+                assert logger.log_prediction("new.jpg", [])
+                assert logger.flush()
+            finally:
+                logger.close()
+
+            backups = [name for name in os.listdir(log_dir) if name.startswith("predictions_")]
+            print(f"   File dimulai {age_s} s lalu: rotations {logger.rotations}, backup {len(backups)}")
+            assert (logger.rotations == 1) is rotated
+            assert len(backups) == int(rotated)
+
+
+def test_result_logger_bad_record():
+    """Record yang tidak bisa di-serialize di-drop, writer thread tetap hidup"""
+    section("📝 ResultLogger: record rusak")
+    from utils import ResultLogger
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        logger = ResultLogger(log_dir=log_dir)
+        try:
+            assert logger.log_prediction("bad.jpg", [], obj=object())
+            assert logger.log_prediction("good.jpg", [], latency_ms=np.float32(1.5))
+            assert logger.flush()
+            assert logger.log_prediction("after.jpg", [])
+            assert logger.flush()
+            assert logger._thread.is_alive()
+        finally:
+            logger.close()
+
+        print(f"   Stats: {logger.stats()}")
+        assert (logger.written, logger.dropped) == (2, 1)
+        with open(os.path.join(log_dir, ResultLogger.FILENAME), encoding="utf-8") as f:
+            filenames = [json.loads(line)["filename"] for line in f]
+        assert filenames == ["good.jpg", "after.jpg"]
+
+
+def test_motion_gate():
+    """Frame yang hampir sama di-skip, perubahan besar dan refresh_interval memicu inference"""
+    section("🎯 MotionGate: threshold dan refresh")
+    from streaming import MotionGate
+
+    gate = MotionGate(threshold=0.05, refresh_interval=1.0)
+    frame = np.full((48, 64, 3), 100, dtype=np.uint8)
+
+    # Belum ada referensi: selalu inference
+    infer, thumb, _ = gate.check(frame, now=0.0)
+    assert infer
+    gate.accept(thumb, now=0.0)
+
+    infer, _, change = gate.check(frame, now=0.1)
+    assert not infer and change == 0.0
+    # Selisih 5/255 ~ 0.02 di bawah threshold
+    infer, _, change = gate.check(frame + 5, now=0.2)
+    assert not infer and abs(change - 5 / 255) < 1e-3
+    # Selisih 30/255 ~ 0.12 di atas threshold
+    infer, _, change = gate.check(frame + 30, now=0.3)
+    assert infer and change >= 0.05
+    # Frame sama, tapi referensi sudah lebih tua dari refresh_interval
+    infer, _, _ = gate.check(frame, now=1.0)
+    assert infer
+
+    print(f"   Checked {gate.checked}, skipped {gate.skipped}, skip_ratio {gate.skip_ratio:.2f}")
+    assert (gate.checked, gate.skipped) == (5, 2)
+    assert gate.skip_ratio == 0.4
+    assert MotionGate.from_config({"performance": {"motion_threshold": 0}}) is None
+    assert MotionGate.from_config({"performance": {"motion_threshold": 0.05}}).threshold == 0.05
+
+
+def test_stream_worker_result():
+    """Rerun yang mengirim frame menerima hasil frame itu sendiri, termasuk frame terakhir"""
+    section("🎥 StreamWorker: hasil per frame")
+    import base64
+    from streaming import StreamWorker
+
+    def data_url(value):
+        image = np.full((16, 16, 3), value, dtype=np.uint8)
+        return "data:image/png;base64," + base64.b64encode(_encode(image, "PNG")).decode("ascii")
+
+    backend = FakeBackend(delay=0.1)
+    worker = StreamWorker(backend)
+    for frame_id, value in enumerate((1, 2, 3), 1):
+        assert worker.submit(("s", frame_id), data_url(value))
+        result = worker.wait_result(("s", frame_id))
+        print(f"   Frame #{result['frame_id']}: {result['label']} ({result['latency_ms']:.0f} ms)")
+        assert result["frame_id"] == frame_id
+        assert result["label"] == backend.names[value]
+
+    # Rerun tanpa frame baru tidak submit ulang dan tidak menunggu
+    assert not worker.submit(("s", 3), data_url(3))
+    start = time.perf_counter()
+    assert worker.wait_result(("s", 3))["frame_id"] == 3
+    assert time.perf_counter() - start < 0.05
+
+    # Frame rusak tetap menghasilkan hasil (error), rerun tidak menunggu sampai timeout
+    assert worker.submit(("s", 4), "data:image/png;base64,AAAA")
+    assert "error" in worker.wait_result(("s", 4), timeout=5)
+
+
+def _png_header(width, height):
+    """Signature + chunk IHDR saja: cukup untuk probe, tidak bisa di-decode"""
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr + b"\x00" * 4
+
+
+def _encode(image, fmt):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def test_ingest_probe():
+    """Dimensi dibaca dari header tiap format, termasuk fallback Pillow dan BMP OS/2"""
+    section("🔍 Ingest: probe header")
+    from ingest import probe_image
+
+    image = np.zeros((30, 40, 3), dtype=np.uint8)
+    assert probe_image(_png_header(640, 480)) == ("png", 640, 480)
+    for fmt in ("JPEG", "PNG", "BMP", "GIF", "WEBP", "TIFF"):
+        probed = probe_image(_encode(image, fmt))
+        print(f"   {fmt:<5} -> {probed}")
+        assert probed == (fmt.lower(), 40, 30)
+
+    # BITMAPCOREHEADER: ukuran header 12, lebar dan tinggi 16-bit
+    core = b"BM" + b"\x00" * 12 + struct.pack("<IHHHH", 12, 320, 200, 1, 24) + b"\x00" * 8
+    assert probe_image(core) == ("bmp", 320, 200)
+    assert probe_image(io.BytesIO(_png_header(7, 9))) == ("png", 7, 9)
+
+
+def test_ingest_validation():
+    """Decompression bomb -> OverflowError, bukan gambar / header rusak -> ValueError"""
+    section("🛡️ Ingest: validasi sebelum decode")
+    from ingest import decode_image, validate_image
+
+    bomb = _png_header(100_000, 100_000)
+    for func in (validate_image, decode_image):
+        try:
+            func(bomb)
+            raise AssertionError(f"{func.__name__} menerima gambar 10 gigapixel")
+        except OverflowError as e:
+            print(f"   {func.__name__}: OverflowError ({e})")
+    assert validate_image(_png_header(400, 300), max_pixels=120_000) == ("png", 400, 300)
+
+    invalid = {
+        "bukan gambar": b"bukan gambar sama sekali, hanya teks biasa",
+        "terlalu kecil": b"\x89PNG\r\n\x1a\n",
+        "JPEG terpotong": b"\xff\xd8\xff\xe0\x00\x10JFIF",
+        "dimensi nol": _png_header(0, 480),
+    }
+    for name, data in invalid.items():
+        try:
+            validate_image(data)
+            raise AssertionError(f"{name} diterima")
+        except ValueError:
+            pass
+    print(f"   ValueError: {', '.join(invalid)}")
+
+    image = np.random.randint(0, 256, (30, 40, 3), dtype=np.uint8)
+    decoded = decode_image(_encode(image, "PNG"))
+    assert decoded.shape == (30, 40, 3) and np.array_equal(decoded, image)
+
+
+class TableBackend(FakeBackend):
+    """Backend palsu dengan probs tetap per gambar (dict gambar -> list probs)"""
+
+    def __init__(self, table, version):
+        super().__init__(num_classes=len(next(iter(table.values()))))
+        self.table = table
+        self.version = version
+
+    def predict(self, batch):
+        self.calls.append(list(batch))
+        return np.array([self.table[image] for image in batch], dtype=np.float32).reshape(len(batch), self.num_classes)
+
+
+def test_cascade_escalation():
+    """Hanya gambar dengan top-1 di bawah threshold diteruskan ke model akurat, dalam satu batch"""
+    section("🪜 Cascade: escalation dan stats")
+    from cascade import DEFAULT_THRESHOLD, CascadeBackend
+
+    fast = TableBackend({
+        0: [0.9, 0.05, 0.05],   # yakin, diterima
+        1: [0.4, 0.35, 0.25],   # ragu, model akurat setuju (kelas 0)
+        2: [0.2, 0.3, 0.5],     # tepat di threshold, diterima
+        3: [0.3, 0.45, 0.25],   # ragu, model akurat tidak setuju
+    }, "fast:1")
+    accurate = TableBackend({
+        0: [0.8, 0.1, 0.1],
+        1: [0.7, 0.2, 0.1],
+        2: [0.1, 0.1, 0.8],
+        3: [0.1, 0.1, 0.8],
+    }, "acc:1")
+
+    cascade = CascadeBackend(fast, accurate, threshold=0.5)
+    probs = cascade.predict([0, 1, 2, 3])
+    assert accurate.calls == [[1, 3]]
+    assert np.allclose(probs[0], fast.table[0]) and np.allclose(probs[2], fast.table[2])
+    assert np.allclose(probs[1], accurate.table[1]) and np.allclose(probs[3], accurate.table[3])
+
+    # Batch tanpa gambar ragu tidak memanggil model akurat sama sekali
+    assert np.allclose(cascade.predict_one(0), fast.table[0])
+    assert len(accurate.calls) == 1
+    assert cascade.predict([]).shape[0] == 0
+
+    stats = cascade.stats()
+    print(f"   Stats: {stats}")
+    assert (stats["total"], stats["escalated"]) == (5, 2)
+    assert stats["escalation_rate"] == 0.4
+    assert stats["escalated_agreement"] == 0.5
+    assert stats["accepted_agreement"] is None
+
+    # Delegasi atribut dan versi untuk kunci cache
+    assert cascade.names == accurate.names and cascade.imgsz == accurate.imgsz
+    assert cascade.version == "cascade:fast:1:acc:1:0.5"
+    assert CascadeBackend.from_config({}, fast, accurate).threshold == DEFAULT_THRESHOLD
+
+
+def test_cascade_audit():
+    """audit_rate=1: jawaban yang diterima tetap dicek model akurat tanpa mengubah hasilnya"""
+    section("🪜 Cascade: audit dan validasi")
+    from cascade import CascadeBackend
+
+    fast = TableBackend({0: [0.9, 0.1], 1: [0.8, 0.2], 2: [0.45, 0.55]}, "fast:1")
+    accurate = TableBackend({0: [0.7, 0.3], 1: [0.1, 0.9], 2: [0.2, 0.8]}, "acc:1")
+
+    cascade = CascadeBackend.from_config({"cascade": {"threshold": 0.6, "audit_rate": 1.0}}, fast, accurate)
+    probs = cascade.predict([0, 1, 2])
+    assert accurate.calls == [[0, 1, 2]]
+    assert np.allclose(probs[:2], [fast.table[0], fast.table[1]])
+    assert np.allclose(probs[2], accurate.table[2])
+
+    stats = cascade.stats()
+    print(f"   Stats: {stats}")
+    assert (stats["audited"], stats["accepted_agreement"]) == (2, 0.5)
+    assert (stats["escalated"], stats["escalated_agreement"]) == (1, 1.0)
+
+    try:
+        CascadeBackend(fast, FakeBackend(num_classes=3), threshold=0.5)
+        raise AssertionError("Jumlah kelas berbeda diterima")
+    except ValueError as e:
+        print(f"   ValueError: {e}")
+
+
+def test_video_properties():
+    """fps video NTSC tetap 29.97, stride dan jumlah frame sama dengan iter_frames"""
+    section("🎬 Video: fps float")
+    import cv2
+    from utils import VideoUtils
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "ntsc.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30000 / 1001, (32, 32))
+        for index in range(40):
+            writer.write(np.full((32, 32, 3), index, dtype=np.uint8))
+        writer.release()
+
+        props = VideoUtils.get_video_properties(path)
+        stride = VideoUtils.frame_stride(props["fps"], target_fps=5)
+        frames = list(VideoUtils.iter_frames(path, target_fps=5))
+        print(f"   fps {props['fps']:.4g}, stride {stride}, frame {len(frames)}")
+        assert abs(props["fps"] - 29.97) < 0.01
+        assert len(frames) == -(-props["frame_count"] // stride)
+        assert frames[1][0] == stride and abs(frames[1][1] - stride / props["fps"]) < 1e-9
+
+
+def _start_server(backend, config=None):
+    """Server inference di port bebas (127.0.0.1) dengan backend palsu, tanpa config.json"""
+    from server import create_server
+
+    server = create_server("127.0.0.1", 0, backend, config=config or {"performance": {"micro_batch_size": 4}})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _request(connection, method, path, body=None, headers=None):
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    return response, response.read()
+
+
+def test_server_predict():
+    """/predict dan /predict/batch (JSON, length-prefixed, binary) lewat koneksi keep-alive"""
+    section("🌐 Server: predict")
+    import base64
+    import http.client
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backend = FakeBackend()
+        # Registry menghitung footprint model utama dari ukuran file
+        backend.model_path = os.path.join(tmp_dir, "fake.pt")
+        open(backend.model_path, "wb").close()
+        server = _start_server(backend)
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+        try:
+            images = [_encode(np.full((16, 16, 3), value, dtype=np.uint8), "PNG") for value in (1, 2, 3)]
+
+            response, body = _request(connection, "POST", "/predict", images[1])
+            assert response.status == 200 and json.loads(body)["label"] == "C"
+            assert float(response.getheader("X-Inference-Ms")) >= 0
+
+            payload = json.dumps({"images": [base64.b64encode(image).decode("ascii") for image in images]})
+            response, body = _request(connection, "POST", "/predict/batch", payload,
+                                      {"Content-Type": "application/json"})
+            assert response.status == 200
+            assert [item["label"] for item in json.loads(body)["predictions"]] == ["B", "C", "D"]
+
+            framed = b"".join(struct.pack(">I", len(image)) + image for image in images)
+            response, body = _request(connection, "POST", "/predict/batch?format=bin", framed,
+                                      {"Content-Type": "application/octet-stream"})
+            probs = np.frombuffer(body, dtype="<f4").reshape(3, backend.num_classes)
+            assert response.getheader("X-Shape") == "3,4"
+            assert list(probs.argmax(axis=1)) == [1, 2, 3]
+
+            response, body = _request(connection, "GET", "/health")
+            assert response.status == 200 and json.loads(body)["num_classes"] == 4
+            print(f"   4 request di satu koneksi, backend dipanggil {len(backend.calls)}x")
+            assert response.getheader("Connection") != "close"
+        finally:
+            connection.close()
+            server.shutdown()
+            server.server_close()
+
+
+def test_server_errors():
+    """Body salah -> 400 dengan pesan jelas; error sebelum body dibaca menutup koneksi keep-alive"""
+    section("🌐 Server: error dan keep-alive")
+    import http.client
+    import socket
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backend = FakeBackend()
+        backend.model_path = os.path.join(tmp_dir, "fake.pt")
+        open(backend.model_path, "wb").close()
+        server = _start_server(backend)
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+        try:
+            cases = [
+                ("/predict/batch", json.dumps({"image": []}), {"Content-Type": "application/json"}, "list 'images'"),
+                ("/predict/batch", json.dumps({"images": []}), {"Content-Type": "application/json"}, "kosong"),
+                ("/predict", b"bukan gambar sama sekali, hanya teks", {}, "dikenali"),
+                ("/predict?model=cascade", _encode(np.zeros((8, 8, 3), dtype=np.uint8), "PNG"), {}, "Cascade"),
+            ]
+            for path, body, headers, message in cases:
+                response, data = _request(connection, "POST", path, body, headers)
+                error = json.loads(data)["error"]
+                print(f"   {path}: {response.status} {error}")
+                assert response.status in (400, 404) and message in error
+                # Body sudah dibaca penuh: koneksi tetap bisa dipakai
+                assert response.getheader("Connection") != "close"
+
+            # Content-Length tidak valid / terlalu besar: body tidak dibaca, sisa bytes-nya tidak
+            # boleh diproses sebagai request berikutnya di koneksi yang sama
+            smuggled = b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n"
+            for length, status in ((b"abc", b"400"), (b"999999999999", b"413")):
+                with socket.create_connection(("127.0.0.1", server.server_port), timeout=5) as sock:
+                    sock.sendall(b"POST /predict HTTP/1.1\r\nHost: x\r\nContent-Length: " + length
+                                 + b"\r\n\r\n" + smuggled)
+                    received = b""
+                    while True:
+                        chunk = sock.recv(65536)
+                        if not chunk:
+                            break
+                        received += chunk
+                assert received.startswith(b"HTTP/1.1 " + status)
+                assert b"Connection: close" in received
+                assert received.count(b"HTTP/1.1 ") == 1
+            print("   Content-Length salah: satu response lalu koneksi ditutup")
+        finally:
+            connection.close()
+            server.shutdown()
+            server.server_close()
+
+
+def test_reloadable_backend():
+    """File model berubah -> load + smoke test di background -> swap atomik; smoke test gagal -> model lama tetap"""
+    section("🔄 ReloadableBackend: hot reload")
+    from unittest import mock
+    import registry
+    from registry import ReloadableBackend
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, "best.pt")
+        broken_path = os.path.join(tmp_dir, "broken.pt")
+        config_path = os.path.join(tmp_dir, "config.json")
+        for path in (model_path, broken_path):
+            with open(path, "wb") as f:
+                f.write(b"v1")
+        with open(config_path, "w") as f:
+            json.dump({"models": {"main": {"path": model_path}}, "performance": {"model": "main"}}, f)
+
+        loading = threading.Event()
+        release = threading.Event()
+
+        def fake_create_backend(model_key, config, path=None):
+            # Load lambat: request selama load harus tetap dilayani model lama
+            loading.set()
+            release.wait(5)
+            backend = FakeBackend(short=path == broken_path)
+            backend.model_path, backend.version = path, f"fake:{os.path.getsize(path)}"
+            return backend
+
+        old = FakeBackend()
+        old.model_path = model_path
+        reloadable = ReloadableBackend(old, "main", config_path=config_path, warmup_iterations=1)
+        with mock.patch.object(registry, "create_backend", fake_create_backend):
+            reloadable.watch(0.05)
+            try:
+                # Signature file berubah (ukuran), watcher me-reload setelah satu poll stabil
+                with open(model_path, "wb") as f:
+                    f.write(b"v2 weights")
+                assert loading.wait(5)
+                assert reloadable.loading and reloadable.backend is old
+                reloadable.predict([1])
+                assert len(old.calls) == 1
+                release.set()
+                deadline = time.perf_counter() + 5
+                while reloadable.generation == 1 and time.perf_counter() < deadline:
+                    time.sleep(0.01)
+            finally:
+                reloadable.stop()
+                release.set()
+
+            new = reloadable.backend
+            print(f"   Swap: generation {reloadable.generation}, versi {new.version}")
+            assert new is not old and reloadable.generation == 2
+            assert new.version == "fake:10" and reloadable.last_error is None
+            assert int(np.argmax(reloadable.predict_one(3))) == 3 and len(old.calls) == 1
+
+            # Output (0, num_classes) tidak lolos smoke test: error di Future, model aktif tidak berubah
+            error = reloadable.reload(broken_path).exception(timeout=5)
+            print(f"   Smoke test gagal: {reloadable.last_error}")
+            assert isinstance(error, ValueError)
+            assert reloadable.backend is new and reloadable.generation == 2
+            assert reloadable.status()["last_error"].startswith("ValueError")
+
+
+def test_model_registry_eviction():
+    """Budget memori: model LRU di-evict lebih dulu, model pinned tidak pernah di-evict"""
+    section("🧠 ModelRegistry: LRU eviction")
+    from unittest import mock
+    import registry
+    from registry import ModelRegistry
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        models = {}
+        for key in ("main", "a", "b", "c"):
+            path = os.path.join(tmp_dir, f"{key}.pt")
+            # File sparse 8 MB: footprint model = ukuran file (backend palsu hampir tidak menambah RSS)
+            with open(path, "wb") as f:
+                f.truncate(8 * 1024 * 1024)
+            models[key] = {"path": path}
+
+        def fake_create_backend(model_key, config, path=None):
+            backend = FakeBackend()
+            backend.model_path, backend.version = path, f"fake:{model_key}"
+            return backend
+
+        # Model utama (pinned) + 2 model lain muat dalam 28 MB, model ke-4 memaksa eviction
+        models_registry = ModelRegistry({"models": models}, budget_mb=28)
+        with mock.patch.object(registry, "create_backend", fake_create_backend), \
+                mock.patch.object(registry, "_import_runtime", lambda path: None):
+            models_registry.add("main", FakeBackend(), pinned=True, footprint_mb=8)
+            models_registry.get("a")
+            models_registry.get("b")
+            # "a" dipakai lagi, "b" jadi yang paling lama tidak dipakai
+            models_registry.get("a")
+            models_registry.get("c")
+            loaded = [model["key"] for model in models_registry.stats()["models"]]
+            print(f"   Setelah load c: {loaded}")
+            assert loaded == ["main", "a", "c"] and models_registry.evictions == 1
+
+            # "c" di-pin: load "b" lagi harus meng-evict "a" walaupun "main" dan "c" lebih lama
+            models_registry.pin("c")
+            models_registry.get("a")
+            models_registry.get("b")
+            loaded = [model["key"] for model in models_registry.stats()["models"]]
+            print(f"   Setelah pin c, load b: {loaded}")
+            assert loaded == ["main", "c", "b"]
+            assert models_registry.evictions == 2 and models_registry.loads == 4
+            assert models_registry.used_mb() <= models_registry.budget_mb
+
+
+def run_all_tests():
+    """Run semua tests, return exit code"""
+    tests = {
+        "MicroBatcher batching": test_micro_batcher_batching,
+        "MicroBatcher max_wait": test_micro_batcher_max_wait,
+        "MicroBatcher errors": test_micro_batcher_errors,
+        "PredictionCache LRU entries": test_prediction_cache_lru_entries,
+        "PredictionCache LRU bytes": test_prediction_cache_lru_bytes,
+        "ResultLogger rotation": test_result_logger_rotation,
+        "ResultLogger drop on full": test_result_logger_drop_on_full,
+        "ResultLogger age rotation": test_result_logger_age_rotation,
+        "ResultLogger bad record": test_result_logger_bad_record,
+        "MotionGate": test_motion_gate,
+        "StreamWorker result": test_stream_worker_result,
+        "Ingest probe": test_ingest_probe,
+        "Ingest validation": test_ingest_validation,
+        "Cascade escalation": test_cascade_escalation,
+        "Cascade audit": test_cascade_audit,
+        "Video properties": test_video_properties,
+        "Server predict": test_server_predict,
+        "Server errors": test_server_errors,
+        "ReloadableBackend": test_reloadable_backend,
+        "ModelRegistry eviction": test_model_registry_eviction,
+    }
+
+    results = {}
+    for test_name, test in tests.items():
+        try:
+            test()
+            results[test_name] = True
+        except Exception as e:
+            print(f"❌ {type(e).__name__}: {e}")
+            results[test_name] = False
+
+    # Summary
+    section("📊 Test Summary")
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"{test_name:.<35} {status}")
+    passed = sum(1 for result in results.values() if result)
+    print(f"Total: {passed}/{len(results)} tests passed")
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -3,11 +3,16 @@ Utilities untuk YOLO BISINDO Predictor
 Helper functions dan utilities
 """
 
-import cv2
+# cv2 di-import di dalam fungsi yang memakainya supaya import utils (dan first paint UI) tidak menunggu OpenCV
 import numpy as np
 from PIL import Image
+import atexit
 import json
 import os
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
 class ImageUtils:
@@ -16,6 +21,7 @@ class ImageUtils:
     @staticmethod
     def resize_image(image, max_width=1920, max_height=1080):
         """Resize gambar dengan mempertahankan aspect ratio"""
+        import cv2
         height, width = image.shape[:2]
         
         if width > max_width or height > max_height:
@@ -26,20 +32,39 @@ class ImageUtils:
         
         return image
     
+    @staticmethod
+    def fit_square(image, size):
+        """Center crop persegi lalu resize ke size x size (input model klasifikasi)"""
+        import cv2
+        height, width = image.shape[:2]
+        side = min(height, width)
+        top = (height - side) // 2
+        left = (width - side) // 2
+        crop = image[top:top + side, left:left + side]
+        
+        if side == size:
+            return crop
+        # INTER_AREA untuk downscale, hasilnya mendekati resize antialias saat training
+        interpolation = cv2.INTER_AREA if side > size else cv2.INTER_LINEAR
+        return cv2.resize(crop, (size, size), interpolation=interpolation)
+    
     @staticmethod
     def enhance_image(image, brightness=0, contrast=1.0):
         """Enhance gambar dengan brightness dan contrast"""
+        import cv2
         image = cv2.convertScaleAbs(image, alpha=contrast, beta=brightness)
         return image
     
     @staticmethod
     def convert_to_rgb(image):
         """Convert BGR ke RGB"""
+        import cv2
         return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     
     @staticmethod
     def draw_text(image, text, position, font_scale=0.8, color=(255, 255, 255)):
         """Draw text pada image"""
+        import cv2
         cv2.putText(image, text, position, cv2.FONT_HERSHEY_SIMPLEX, 
                    font_scale, color, 2, cv2.LINE_AA)
         return image
@@ -47,6 +72,7 @@ class ImageUtils:
     @staticmethod
     def draw_box(image, x1, y1, x2, y2, color=(0, 255, 0), thickness=2):
         """Draw bounding box pada image"""
+        import cv2
         cv2.rectangle(image, (x1, y1), (x2, y2), color, thickness)
         return image
 
@@ -56,14 +82,22 @@ class VideoUtils:
     
     @staticmethod
     def get_video_properties(video_path):
-        """Get properties dari video file"""
+        """Get properties dari video file (sekali buka file)
+        
+        fps tetap float (29.97, bukan 29) supaya stride, jumlah frame dan timestamp sama
+        dengan iter_frames; dibulatkan hanya saat ditampilkan
+        """
+        import cv2
         cap = cv2.VideoCapture(video_path)
         
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
         properties = {
-            'fps': int(cap.get(cv2.CAP_PROP_FPS)),
-            'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            'fps': fps,
+            'frame_count': int(frame_count),
             'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'duration': frame_count / fps if fps > 0 else 0.0
         }
         
         cap.release()
@@ -72,31 +106,82 @@ class VideoUtils:
     @staticmethod
     def get_video_duration(video_path):
         """Get durasi video dalam detik"""
+        return VideoUtils.get_video_properties(video_path)['duration']
+    
+    @staticmethod
+    def frame_stride(fps, stride=None, target_fps=None):
+        """Hitung stride frame dari stride eksplisit atau target FPS sampling"""
+        if stride:
+            return max(1, int(stride))
+        if target_fps and fps > 0:
+            return max(1, int(round(fps / target_fps)))
+        return 1
+    
+    @staticmethod
+    def iter_frames(video_path, stride=None, target_fps=None):
+        """Generator frame (index, timestamp_detik, frame RGB), decode lazy
+        
+        Frame yang di-skip hanya di-grab (tanpa decode) sehingga memory tetap flat
+        """
+        import cv2
         cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-        duration = frame_count / fps
-        cap.release()
-        return duration
+        if not cap.isOpened():
+            raise IOError(f"Video tidak dapat dibuka: {video_path}")
+        
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        step = VideoUtils.frame_stride(fps, stride, target_fps)
+        index = 0
+        
+        try:
+            while cap.grab():
+                if index % step == 0:
+                    ok, frame = cap.retrieve()
+                    if not ok:
+                        break
+                    yield index, index / fps, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                index += 1
+        finally:
+            cap.release()
 
 
 class ConfigManager:
     """Manage config file"""
     
+    # Cache per path: ((mtime_ns, size), config), file hanya dibaca ulang kalau berubah
+    _cache = {}
+    
     @staticmethod
     def load_config(config_path="config.json"):
-        """Load config dari file"""
+        """Load config dari file (di-cache, invalidasi berdasarkan mtime + ukuran file)
+        
+        Dict yang dikembalikan dipakai bersama, copy.deepcopy dulu sebelum dimodifikasi
+        """
+        path = os.path.abspath(config_path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = ConfigManager._cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        
         try:
-            with open(config_path, 'r') as f:
-                return json.load(f)
+            with open(path, 'r') as f:
+                config = json.load(f)
         except FileNotFoundError:
             return None
+        ConfigManager._cache[path] = (signature, config)
+        return config
     
     @staticmethod
     def save_config(config, config_path="config.json"):
         """Save config ke file"""
         with open(config_path, 'w') as f:
             json.dump(config, f, indent=2)
+        # Jangan andalkan resolusi mtime filesystem, buang cache secara eksplisit
+        ConfigManager._cache.pop(os.path.abspath(config_path), None)
     
     @staticmethod
     def get_model_path(model_type="detection", config=None):
@@ -110,25 +195,29 @@ class ConfigManager:
                 return models.get("detection", {}).get("path", "best.pt")
             elif model_type == "classification":
                 return models.get("classification", {}).get("path", "yolov8n-cls.pt")
+            elif model_type in models:
+                return models[model_type].get("path")
         
         return None
 
 
 class FPSCounter:
-    """Counter untuk FPS calculation"""
+    """Counter untuk FPS calculation (clock monotonic, rata-rata window frame terakhir)"""
     
-    def __init__(self):
-        self.prev_frame_time = 0
-        self.current_time = 0
+    def __init__(self, window=30):
+        self.prev_frame_time = None
+        self.current_time = None
         self.fps = 0
+        self._intervals = deque(maxlen=window)
     
     def update(self):
         """Update FPS counter"""
-        self.current_time = datetime.now()
+        self.current_time = time.perf_counter()
         
-        if self.prev_frame_time != 0:
-            time_diff = (self.current_time - self.prev_frame_time).total_seconds()
-            self.fps = 1 / time_diff if time_diff > 0 else 0
+        if self.prev_frame_time is not None:
+            self._intervals.append(self.current_time - self.prev_frame_time)
+            elapsed = sum(self._intervals)
+            self.fps = len(self._intervals) / elapsed if elapsed > 0 else 0
         
         self.prev_frame_time = self.current_time
         return self.fps
@@ -139,28 +228,180 @@ class FPSCounter:
 
 
 class ResultLogger:
-    """Log hasil prediksi"""
+    """Log hasil prediksi ke satu file JSONL (append-only) lewat background writer
+    
+    log_prediction tidak pernah block: record masuk queue terbatas, kalau penuh
+    record di-drop dan dihitung di `dropped`. Writer menulis per batch, flush
+    tiap flush_interval detik, dan merotasi file berdasarkan ukuran / umur
+    """
+    
+    FILENAME = "predictions.jsonl"
     
-    def __init__(self, log_dir="logs"):
+    def __init__(self, log_dir="logs", max_bytes=50 * 1024 * 1024, rotate_seconds=24 * 3600,
+                 backup_count=10, queue_size=10000, flush_interval=1.0, batch_size=512):
         self.log_dir = log_dir
+        self.path = os.path.join(log_dir, self.FILENAME)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
-    
-    def log_prediction(self, filename, predictions):
-        """Log hasil prediksi"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_file = os.path.join(self.log_dir, f"predictions_{timestamp}.json")
         
-        log_data = {
-            "timestamp": timestamp,
-            "filename": filename,
-            "predictions": predictions
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._started_at = 0.0
+        self._thread = threading.Thread(target=self._run, name="result-logger", daemon=True)
+        self._thread.start()
+        # Record yang masih di queue ditulis saat proses keluar
+        atexit.register(self.close)
+    
+    @classmethod
+    def from_config(cls, config):
+        """Buat logger dari config.json "logging", None kalau dimatikan"""
+        logging_config = (config or {}).get("logging", {})
+        if not logging_config.get("enabled", False):
+            return None
+        return cls(
+            log_dir=logging_config.get("log_dir", "logs"),
+            max_bytes=float(logging_config.get("max_mb", 50)) * 1024 * 1024,
+            rotate_seconds=float(logging_config.get("rotate_hours", 24)) * 3600,
+            backup_count=int(logging_config.get("backup_count", 10)),
+            queue_size=int(logging_config.get("queue_size", 10000)),
+            flush_interval=float(logging_config.get("flush_interval_s", 1.0)),
+        )
+    
+    def log_prediction(self, filename, predictions, **extra):
+        """Antrekan satu record, return False kalau queue penuh (record di-drop)"""
+        record = {"timestamp": time.time(), "filename": filename, "predictions": predictions}
+        record.update(extra)
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+    
+    def flush(self, timeout=5.0):
+        """Tunggu sampai semua record yang sudah diantrekan tertulis ke disk"""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+    
+    def close(self, timeout=5.0):
+        if self._thread.is_alive():
+            self.flush(timeout)
+            self._queue.put(None)
+            self._thread.join(timeout)
+    
+    def stats(self):
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "rotations": self.rotations,
         }
+    
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            
+            # Ambil sebanyak mungkin record yang sudah antre, tulis sekali
+            items = [first]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            records = [item for item in items if isinstance(item, dict)]
+            if records:
+                try:
+                    self._write(records)
+                except Exception:
+                    # Satu batch bermasalah tidak boleh menghentikan writer thread
+                    self.dropped += len(records)
+            
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is None for item in items):
+                if self._file:
+                    self._file.close()
+                return
+    
+    def _write(self, records):
+        lines = []
+        for record in records:
+            try:
+                record["timestamp"] = datetime.fromtimestamp(record["timestamp"]).isoformat(timespec="milliseconds")
+                lines.append(json.dumps(record, default=_json_default))
+            except (TypeError, ValueError, OverflowError):
+                # Record yang tidak bisa di-serialize di-drop, record lain tetap ditulis
+                self.dropped += 1
+        if not lines:
+            return
         
-        with open(log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        try:
+            if self._file is None:
+                self._open()
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            self.written += len(lines)
+            
+            if self._file.tell() >= self.max_bytes or time.time() - self._started_at >= self.rotate_seconds:
+                self._rotate()
+        except OSError:
+            self.dropped += len(records)
+    
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        # Umur file lama dihitung dari record pertamanya (bukan mtime = write terakhir)
+        # supaya rotasi waktu tetap jalan setelah restart walaupun file terus ditambah
+        self._started_at = self._first_record_time() if self._file.tell() > 0 else time.time()
+    
+    def _first_record_time(self):
+        """Timestamp record pertama file log, fallback ke mtime kalau tidak bisa dibaca"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                record = json.loads(f.readline())
+            return datetime.fromisoformat(record["timestamp"]).timestamp()
+        except (OSError, ValueError, TypeError, KeyError):
+            return os.path.getmtime(self.path)
+    
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        os.replace(self.path, os.path.join(self.log_dir, f"predictions_{stamp}.jsonl"))
+        self.rotations += 1
         
-        return log_file
+        backups = sorted(
+            name for name in os.listdir(self.log_dir)
+            if name.startswith("predictions_") and name.endswith(".jsonl")
+        )
+        for name in backups[:-self.backup_count] if self.backup_count > 0 else []:
+            os.remove(os.path.join(self.log_dir, name))
+
+
+def _json_default(value):
+    """numpy scalar / array di record -> tipe JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} tidak bisa di-serialize")
 
 
 class ColorPalette:
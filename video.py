@@ -0,0 +1,60 @@
+"""
+Video inference untuk YOLO BISINDO Predictor
+Decode frame secara lazy, sampling per stride / target FPS, inference per batch
+"""
+
+from backends import top_k
+from batching import iter_batches
+from utils import VideoUtils
+
+
+def iter_video_predictions(backend, video_path, batch_size=8, stride=None, target_fps=None, with_frames=False):
+    """Generator timeline per timestamp: dict(frame, time, label, confidence, top3)
+
+    Hanya satu batch frame yang ada di memory pada satu waktu. with_frames menambahkan
+    frame RGB di key "image" (untuk render), pop sebelum entry disimpan
+    """
+    frames = VideoUtils.iter_frames(video_path, stride=stride, target_fps=target_fps)
+    for batch in iter_batches(frames, batch_size):
+        probs = backend.predict([frame for _, _, frame in batch])
+        for (index, timestamp, frame), row_probs in zip(batch, probs):
+            top = top_k(row_probs, 3)
+            entry = {
+                "frame": index,
+                "time": round(timestamp, 3),
+                "label": backend.names[top[0]],
+                "confidence": float(row_probs[top[0]]),
+                "top3": [backend.names[idx] for idx in top],
+            }
+            if with_frames:
+                entry["image"] = frame
+            yield entry
+
+
+def merge_timeline(entries, min_confidence=0.0):
+    """Gabungkan entry berurutan dengan label sama menjadi segmen (start, end, label)"""
+    segments = []
+    for entry in entries:
+        if entry["confidence"] < min_confidence:
+            continue
+        last = segments[-1] if segments else None
+        if last and last["label"] == entry["label"]:
+            last["end"] = entry["time"]
+            last["frames"] += 1
+            last["confidence"] = max(last["confidence"], entry["confidence"])
+        else:
+            segments.append({
+                "start": entry["time"],
+                "end": entry["time"],
+                "label": entry["label"],
+                "frames": 1,
+                "confidence": entry["confidence"],
+            })
+    return segments
+
+
+# Export video helpers
+__all__ = [
+    'iter_video_predictions',
+    'merge_timeline'
+]
@@ -2,17 +2,32 @@ import streamlit as st
 import numpy as np
 from PIL import Image
 import tempfile
+import shutil
 import os
+import time
 
 try:
-    import cv2
-    from ultralytics import YOLO
+    from backends import load_backend_async, top_k
+    from batching import MicroBatcher, decode_images, predict_in_batches
+    from cache import CachedBackend, PredictionCache
+    from cascade import CascadeBackend
+    from ingest import decode_image
+    from metrics import METRICS
+    from registry import ModelRegistry, ReloadableBackend
+    from render import AsyncVideoWriter, render_image_async
+    from roi import HandROI
+    from streaming import MotionGate, StreamWorker, camera_stream, capture_settings
+    from utils import ConfigManager, ImageUtils, ResultLogger, VideoUtils
+    from video import iter_video_predictions, merge_timeline
 except ImportError:
     st.error("Dependencies not installed")
     st.stop()
 
 st.set_page_config(page_title="YOLO BISINDO", page_icon="🤖", layout="wide")
 
+# Lebar preview gambar upload (px), decode tidak perlu lebih besar dari ini
+DISPLAY_SIDE = 300
+
 st.markdown("""
     <style>
     .title-box {
@@ -25,28 +40,64 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-st.markdown("<div class='title-box'><h1>🤖 YOLO BISINDO Predictor</h1><p>Deteksi Objek Dengan AI</p></div>", unsafe_allow_html=True)
+config = ConfigManager.load_config() or {}
 
 @st.cache_resource
+def start_model_loading():
+    # Import torch, load model dan warmup jalan di background, halaman tetap dirender
+    return load_backend_async(config=config)
+
+model_future = start_model_loading()
+
+st.markdown("<div class='title-box'><h1>🤖 YOLO BISINDO Predictor</h1><p>Deteksi Objek Dengan AI</p></div>", unsafe_allow_html=True)
+
+with st.sidebar:
+    st.header("⚙️ Settings")
+    confidence = st.slider("Confidence Threshold", 0.0, 1.0, 0.5, 0.05)
+    use_roi = st.toggle(
+        "✋ Crop tangan (ROI)", value=config.get("roi", {}).get("enabled", False),
+        help="Klasifikasi hanya area tangan (deteksi warna kulit), bukan seluruh frame"
+    )
+
+@st.cache_resource(show_spinner="⏳ Memuat model...")
 def load_model():
     try:
-        # Use best.pt - model for BISINDO abjad detection (26 classes A-Z)
-        import os
-        if os.path.exists("best.pt"):
-            model = YOLO("best.pt")
-            st.success("✓ Model BISINDO 26 Abjad loaded")
-            return model
-        else:
-            st.error("❌ best.pt tidak ditemukan!")
-            return None
+        # Backend (PyTorch / TFLite) dipilih dari config.json "performance"
+        model = model_future.result()
+        st.success(f"✓ Model BISINDO 26 Abjad loaded ({model.name})")
+        # Model bisa diganti tanpa restart (file baru / tombol reload), session tetap jalan
+        model = ReloadableBackend.from_config(model, config)
+        # Satu model dipakai semua session, request digabung per micro-batch
+        return MicroBatcher.from_config(model, config)
+    except FileNotFoundError as e:
+        st.error(f"❌ {e}")
+        return None
     except Exception as e:
         st.error(f"Error loading model: {e}")
         return None
 
-with st.sidebar:
-    st.header("⚙️ Settings")
-    confidence = st.slider("Confidence Threshold", 0.0, 1.0, 0.5, 0.05)
-    st.info("Model: best.pt\n26 Kelas BISINDO Abjad (A-Z)")
+@st.cache_resource
+def load_prediction_cache():
+    # Cache dipakai bersama semua session, None kalau dimatikan di config
+    return PredictionCache.from_config(config)
+
+@st.cache_resource
+def load_result_logger():
+    # Satu writer thread untuk semua session, None kalau logging dimatikan
+    return ResultLogger.from_config(config)
+
+@st.cache_resource
+def load_model_registry(_model):
+    # Varian model lain di-load saat dipilih, model utama pinned (tidak pernah di-evict)
+    registry = ModelRegistry.from_config(config)
+    registry.add(default_model_key, _model, pinned=True)
+    return registry
+
+@st.cache_resource(show_spinner="⏳ Memuat model cascade...")
+def load_cascade(_accurate):
+    # Tahap pertama pinned di registry, statistik escalation berlaku untuk semua session
+    fast = model_registry.pin(config.get("cascade", {}).get("fast_model", "tflite_float16"))
+    return CascadeBackend.from_config(config, fast, _accurate)
 
 model = load_model()
 
@@ -54,157 +105,391 @@ if model is None:
     st.error("Model failed to load")
     st.stop()
 
-tab1, tab2, tab3, tab4 = st.tabs(["📸 Upload", "🎥 Webcam", "📱 Phone", "ℹ️ Info"])
+default_model_key = config.get("performance", {}).get("model", "detection")
+model_registry = load_model_registry(model)
+result_logger = load_result_logger()
+
+with st.sidebar:
+    model_keys = model_registry.available()
+    if default_model_key not in model_keys:
+        model_keys.insert(0, default_model_key)
+    if config.get("cascade", {}).get("enabled", False):
+        model_keys.append("cascade")
+    model_key = st.selectbox(
+        "🧠 Model", model_keys, index=model_keys.index(default_model_key),
+        format_func=lambda key: "⚡ Cascade (cepat -> akurat)" if key == "cascade"
+        else config.get("models", {}).get(key, {}).get("name", key),
+        help="Varian lain di-load saat dipilih; yang paling lama tidak dipakai di-evict kalau melebihi budget memori. "
+             "Cascade: model cepat dulu, hanya gambar yang ragu diteruskan ke model utama"
+    )
+    try:
+        if model_key == "cascade":
+            model = load_cascade(model)
+            cascade_stats = model.stats()
+            st.caption(f"⚡ Escalate {cascade_stats['escalation_rate']*100:.0f}% dari {cascade_stats['total']} gambar"
+                       + (f" | agreement {cascade_stats['accepted_agreement']*100:.0f}%"
+                          if cascade_stats["accepted_agreement"] is not None else ""))
+        elif model_key != default_model_key:
+            with st.spinner(f"⏳ Memuat {model_key}..."):
+                model = model_registry.get(model_key)
+    except Exception as e:
+        st.error(f"❌ Gagal memuat {model_key}: {e}")
+
+# Upload tab memakai cache (rerun / slider tidak memicu inference ulang),
+# stream kamera dan video langsung ke model karena frame-nya selalu unik
+prediction_cache = load_prediction_cache()
+cached_model = CachedBackend(model, prediction_cache) if prediction_cache else model
+
+with st.sidebar:
+    st.info(f"Model: {os.path.basename(model.model_path)} ({model.name})\n{model.num_classes} Kelas BISINDO Abjad (A-Z)")
+    if hasattr(model, "reload"):
+        if st.button("🔄 Reload model", help="Load ulang file model dari config.json tanpa restart"):
+            with st.spinner("⏳ Memuat model baru..."):
+                try:
+                    model.reload().result()
+                    st.success(f"✓ Model diganti: {os.path.basename(model.model_path)} (versi {model.generation})")
+                except Exception as e:
+                    st.error(f"❌ Reload gagal, model lama tetap dipakai: {e}")
+        elif model.last_error:
+            st.warning(f"⚠️ Reload terakhir gagal: {model.last_error}")
+    registry_stats = model_registry.stats()
+    if registry_stats["budget_mb"] > 0:
+        st.caption(f"🧠 Memori model: {registry_stats['used_mb']:.0f} / {registry_stats['budget_mb']:.0f} MB "
+                   f"({len(registry_stats['models'])} di-load, {registry_stats['evictions']} evicted)")
+    # Diisi di akhir script supaya timing run ini ikut tampil
+    latency_panel = st.empty()
+
+def is_new_prediction(*key):
+    """True sekali per key (mis. upload + versi model + ROI) dalam satu session
+
+    Rerun Streamlit (widget lain, klik download) menjalankan ulang script dengan upload
+    yang sama; prediksinya hanya dicatat ke log saat pertama kali
+    """
+    seen = st.session_state.setdefault("logged_predictions", set())
+    if key in seen:
+        return False
+    seen.add(key)
+    return True
+
+@st.fragment
+def run_camera_stream(key, facing_mode):
+    """Frame dari browser -> worker per session -> hasil frame itu dikirim balik ke komponen
+
+    Fragment: frame baru hanya menjalankan ulang fungsi ini, bukan seluruh script
+    (tab upload / video tidak decode dan predict ulang per frame)
+    """
+    worker_key = f"{key}_worker"
+    if worker_key not in st.session_state:
+        # Gate per stream: referensi frame tidak boleh tercampur antar kamera / session
+        st.session_state[worker_key] = StreamWorker(model, logger=result_logger, gate=MotionGate.from_config(config))
+    worker = st.session_state[worker_key]
+    # Model bisa diganti lewat selectbox selama stream berjalan
+    worker.backend = model
+    # ROI per stream (menyimpan frame sebelumnya untuk deteksi gerakan), dibuat ulang hanya saat toggle berubah
+    if use_roi and worker.roi is None:
+        worker.roi = HandROI.from_config(config, enabled=True, motion=True)
+    elif not use_roi:
+        worker.roi = None
+    
+    # Nilai komponen sudah ter-update di session_state sebelum script rerun
+    frame = st.session_state.get(key)
+    ack = None
+    if frame:
+        frame_key = (frame["stream"], frame["frame_id"])
+        ack = {"stream": frame["stream"], "frame_id": frame["frame_id"]}
+        # Ack dikirim bersama hasil frame ini, bukan hasil frame sebelumnya
+        if worker.submit(frame_key, frame["image"]):
+            worker.wait_result(frame_key)
+    
+    with METRICS.time("render"):
+        # Browser mengirim frame seukuran resolusi decode model, bukan resolusi native kamera
+        capture = capture_settings(config, worker.roi.min_side(model.imgsz) if worker.roi else model.imgsz)
+        camera_stream(key=key, result=worker.latest(), ack=ack, facing_mode=facing_mode, capture=capture)
+
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["📸 Upload", "🎥 Webcam", "📱 Phone", "🎬 Video", "ℹ️ Info"])
 
 # ===== TAB 1: UPLOAD =====
 with tab1:
     st.header("📸 Upload Gambar")
     
-    uploaded = st.file_uploader("Pilih gambar", type=["jpg", "jpeg", "png", "bmp"])
+    upload_mode = st.radio("Mode", ["Satu gambar", "Batch (banyak gambar)"], horizontal=True)
     
+    uploaded = None
+    uploaded_files = []
+    if upload_mode == "Satu gambar":
+        uploaded = st.file_uploader("Pilih gambar", type=["jpg", "jpeg", "png", "bmp"])
+    else:
+        uploaded_files = st.file_uploader(
+            "Pilih banyak gambar", type=["jpg", "jpeg", "png", "bmp"], accept_multiple_files=True
+        )
+    
+    img_array = None
     if uploaded:
+        # Header dicek dulu (format, dimensi, decompression bomb), lalu decode langsung dari
+        # buffer upload (tanpa copy) di resolusi kecil
+        roi = HandROI.from_config(config, enabled=use_roi)
+        start = time.perf_counter()
+        try:
+            img_array = decode_image(uploaded, min_side=max(roi.min_side(model.imgsz) if roi else model.imgsz, DISPLAY_SIDE))
+        except Exception as e:
+            st.error(f"❌ {uploaded.name} ditolak: {e}")
+        decode_time = time.perf_counter() - start
+    
+    if img_array is not None:
         col1, col2 = st.columns(2)
         
         with col1:
-            img = Image.open(uploaded)
-            # Convert RGBA to RGB if needed
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-            st.image(img, caption="Gambar Original", width=300)
-            img_array = np.array(img)
-        
+            # Crop + resize ke input model
+            start = time.perf_counter()
+            roi_box = None
+            model_input = img_array
+            if roi:
+                model_input, roi_box = roi.apply(img_array)
+            model_input = ImageUtils.fit_square(model_input, model.imgsz)
+            preprocess_time = time.perf_counter() - start
+            
+            with METRICS.time("render"):
+                if roi_box:
+                    preview = ImageUtils.draw_box(img_array.copy(), *roi_box, color=(0, 255, 0), thickness=3)
+                    st.image(preview, caption="Gambar Original (kotak hijau = ROI tangan)", width=DISPLAY_SIDE)
+                else:
+                    st.image(img_array, caption="Gambar Original", width=DISPLAY_SIDE)
+                    if roi:
+                        st.caption("✋ Tangan tidak terdeteksi, memakai seluruh gambar")
+
         with col2:
             st.subheader("📊 Hasil Deteksi")
-            
+
             with st.spinner("🔄 Memproses..."):
                 try:
-                    # Run prediction (classification)
-                    results = model.predict(source=img_array, conf=confidence, verbose=False)
-                    
-                    if results is not None and len(results) > 0:
-                        result = results[0]
+                    # Run prediction (classification), probs shape (num_classes,)
+                    start = time.perf_counter()
+                    probs = cached_model.predict_one(model_input)
+                    inference_time = time.perf_counter() - start
+
+                    if probs.size > 0:
+                        with METRICS.time("postprocess"):
+                            sorted_probs = top_k(probs, 3)
+                            top_idx = sorted_probs[0]
+                            top_conf = float(probs[top_idx])
+                            class_name = model.names[top_idx]
                         
-                        # For classification model - get top predictions
-                        if hasattr(result, 'probs') and result.probs is not None:
-                            probs = result.probs
-                            top_idx = int(probs.top1) if hasattr(probs, 'top1') else np.argmax(probs.data.cpu().numpy())
-                            top_conf = float(probs.top1conf) if hasattr(probs, 'top1conf') else float(np.max(probs.data.cpu().numpy()))
-                            class_name = result.names[top_idx]
-                            
+                        if result_logger and is_new_prediction("upload", uploaded.file_id, model.version, roi_box):
+                            result_logger.log_prediction(
+                                uploaded.name, [[model.names[idx], float(probs[idx])] for idx in sorted_probs],
+                                source="upload", latency_ms=round(inference_time * 1000, 3),
+                            )
+
+                        # Gambar beranotasi (resolusi penuh) di-render di thread encoder selama UI ditulis,
+                        # sekali per upload + hasil: rerun (widget lain, klik download) memakai Future yang sama
+                        render_key = (uploaded.file_id, class_name, roi_box, top_conf >= confidence)
+                        rendered = st.session_state.get("annotated_upload")
+                        if rendered is None or rendered[0] != render_key:
+                            rendered = st.session_state["annotated_upload"] = (render_key, render_image_async(
+                                uploaded.getvalue(), class_name, top_conf, roi_box, img_array.shape[:2], confidence
+                            ))
+                        annotated = rendered[1]
+
+                        render_start = time.perf_counter()
+                        if top_conf >= confidence:
                             st.success(f"✓ Abjad Terdeteksi!")
-                            st.write("")
-                            st.markdown(f"### 🔤 **{class_name}**")
-                            st.write(f"Confidence: `{top_conf*100:.2f}%`")
-                            st.divider()
-                            
-                            # Show top 3 predictions
-                            st.write("**Top 3 Predictions:**")
-                            sorted_probs = np.argsort(probs.data.cpu().numpy())[::-1][:3]
-                            
-                            for rank, idx in enumerate(sorted_probs, 1):
-                                conf = float(probs.data.cpu().numpy()[idx])
-                                cls_name = result.names[idx]
-                                st.write(f"{rank}. **{cls_name}**: `{conf*100:.2f}%`")
                         else:
-                            st.warning("⚠️ Tidak ada prediksi")
+                            st.warning("⚠️ Confidence di bawah threshold")
+                        st.write("")
+                        st.markdown(f"### 🔤 **{class_name}**")
+                        st.write(f"Confidence: `{top_conf*100:.2f}%`")
+                        st.divider()
+
+                        # Show top 3 predictions
+                        st.write("**Top 3 Predictions:**")
+
+                        for rank, idx in enumerate(sorted_probs, 1):
+                            conf = float(probs[idx])
+                            cls_name = model.names[idx]
+                            st.write(f"{rank}. **{cls_name}**: `{conf*100:.2f}%`")
+                        METRICS.observe("render", time.perf_counter() - render_start)
+                        
+                        st.caption(
+                            f"⏱️ Decode {decode_time*1000:.1f} ms | Preprocess {preprocess_time*1000:.1f} ms"
+                            f" | Inference {inference_time*1000:.1f} ms"
+                        )
+                        st.download_button(
+                            "📥 Download gambar beranotasi", annotated.result(),
+                            file_name=f"{os.path.splitext(uploaded.name)[0]}_{class_name}.jpg", mime="image/jpeg"
+                        )
                     else:
-                        st.warning("⚠️ Prediksi gagal")
-                
+                        st.warning("⚠️ Tidak ada prediksi")
+
                 except Exception as e:
                     st.error(f"❌ Error prediksi: {str(e)}")
 
+    if uploaded_files:
+        batch_size = config.get("performance", {}).get("batch_size", 1)
+
+        with st.spinner(f"🔄 Memproses {len(uploaded_files)} gambar (batch {batch_size})..."):
+            try:
+                # Decode paralel, lalu satu forward pass per batch
+                roi = HandROI.from_config(config, enabled=use_roi)
+                decoded = decode_images(uploaded_files, min_side=roi.min_side(model.imgsz) if roi else model.imgsz)
+                valid = [(f.name, image) for f, (image, error) in zip(uploaded_files, decoded) if error is None]
+                if roi:
+                    valid = [(name, roi.apply(image)[0]) for name, image in valid]
+                failed = [(f.name, error) for f, (image, error) in zip(uploaded_files, decoded) if error is not None]
+
+                rows = []
+                total_time = 0.0
+                file_ids = [f.file_id for f, (image, error) in zip(uploaded_files, decoded) if error is None]
+                for probs, elapsed in predict_in_batches(cached_model, [image for _, image in valid], batch_size):
+                    total_time += elapsed
+                    postprocess_start = time.perf_counter()
+                    for row_probs in probs:
+                        name = valid[len(rows)][0]
+                        sorted_probs = top_k(row_probs, 3)
+                        top_conf = float(row_probs[sorted_probs[0]])
+                        if result_logger and is_new_prediction("batch", file_ids[len(rows)], model.version, use_roi):
+                            result_logger.log_prediction(
+                                name, [[model.names[idx], float(row_probs[idx])] for idx in sorted_probs],
+                                source="batch", latency_ms=round(elapsed / len(probs) * 1000, 3),
+                            )
+                        rows.append({
+                            "File": name,
+                            "Top-1": model.names[sorted_probs[0]],
+                            "Confidence": f"{top_conf*100:.2f}%",
+                            "Top-3": ", ".join(f"{model.names[idx]} ({row_probs[idx]*100:.1f}%)" for idx in sorted_probs),
+                            "Latency (ms)": round(elapsed / len(probs) * 1000, 2),
+                        })
+                    METRICS.observe("postprocess", time.perf_counter() - postprocess_start)
+
+                with METRICS.time("render"):
+                    m1, m2, m3 = st.columns(3)
+                    m1.metric("Gambar", len(rows))
+                    m2.metric("Batch size", batch_size)
+                    m3.metric("Throughput", f"{len(rows) / total_time:.1f} img/s" if total_time > 0 else "-")
+
+                    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+                for name, error in failed:
+                    st.warning(f"⚠️ {name} gagal dibaca: {error}")
+
+            except Exception as e:
+                st.error(f"❌ Error prediksi: {str(e)}")
+
 # ===== TAB 2: WEBCAM =====
 with tab2:
     st.header("🎥 Webcam Real-time")
     
-    st.subheader("📹 Capture Foto Langsung")
-    st.info("💡 Klik tombol CAPTURE untuk foto langsung dari webcam Anda")
-    
-    # Create HTML5 camera input
-    camera_html = """
-    <div style="text-align: center; padding: 20px;">
-        <video id="webcam" autoplay playsinline style="width: 100%; max-width: 500px; border-radius: 10px;"></video>
-        <br><br>
-        <button onclick="captureImage()" style="padding: 10px 20px; font-size: 16px; background-color: #4ECDC4; color: white; border: none; border-radius: 5px; cursor: pointer;">📸 CAPTURE</button>
-        <canvas id="canvas" style="display: none;"></canvas>
-    </div>
-    
-    <script>
-    const video = document.getElementById('webcam');
-    const canvas = document.getElementById('canvas');
-    
-    navigator.mediaDevices.getUserMedia({video: true})
-        .then(stream => {
-            video.srcObject = stream;
-        })
-        .catch(err => {
-            console.error('Error accessing webcam:', err);
-            document.getElementById('webcam').innerHTML = 'Webcam tidak dapat diakses';
-        });
-    
-    function captureImage() {
-        const context = canvas.getContext('2d');
-        canvas.width = video.videoWidth;
-        canvas.height = video.videoHeight;
-        context.drawImage(video, 0, 0);
-        
-        canvas.toBlob(blob => {
-            const url = URL.createObjectURL(blob);
-            window.parent.postMessage({type: 'camera_capture', data: url}, '*');
-        });
-    }
-    </script>
-    """
+    st.subheader("📹 Streaming Langsung")
+    st.info("💡 Klik START, frame webcam dikirim ke server dan hasil prediksi tampil real-time")
     
-    st.html(camera_html)
+    run_camera_stream("webcam_stream", facing_mode="user")
 
 # ===== TAB 3: PHONE =====
 with tab3:
     st.header("📱 Kamera Handphone")
     
-    st.subheader("📹 Capture Foto Langsung")
-    st.info("💡 Gunakan kamera handphone Anda untuk capture foto abjad")
-    
-    # Create HTML5 camera input for phone
-    camera_html_phone = """
-    <div style="text-align: center; padding: 20px;">
-        <video id="webcam_phone" autoplay playsinline style="width: 100%; max-width: 500px; border-radius: 10px;"></video>
-        <br><br>
-        <button onclick="captureImagePhone()" style="padding: 10px 20px; font-size: 16px; background-color: #FF6B6B; color: white; border: none; border-radius: 5px; cursor: pointer;">📸 CAPTURE</button>
-        <canvas id="canvas_phone" style="display: none;"></canvas>
-    </div>
-    
-    <script>
-    const video_phone = document.getElementById('webcam_phone');
-    const canvas_phone = document.getElementById('canvas_phone');
-    
-    navigator.mediaDevices.getUserMedia({video: true})
-        .then(stream => {
-            video_phone.srcObject = stream;
-        })
-        .catch(err => {
-            console.error('Error accessing camera:', err);
-            document.getElementById('webcam_phone').innerHTML = 'Kamera tidak dapat diakses';
-        });
-    
-    function captureImagePhone() {
-        const context = canvas_phone.getContext('2d');
-        canvas_phone.width = video_phone.videoWidth;
-        canvas_phone.height = video_phone.videoHeight;
-        context.drawImage(video_phone, 0, 0);
-        
-        canvas_phone.toBlob(blob => {
-            const url = URL.createObjectURL(blob);
-            window.parent.postMessage({type: 'camera_capture_phone', data: url}, '*');
-        });
-    }
-    </script>
-    """
+    st.subheader("📹 Streaming Langsung")
+    st.info("💡 Gunakan kamera belakang handphone Anda, klik START untuk mulai deteksi")
     
-    st.html(camera_html_phone)
+    run_camera_stream("phone_stream", facing_mode="environment")
 
-# ===== TAB 4: INFO =====
+# ===== TAB 4: VIDEO =====
 with tab4:
+    st.header("🎬 Video")
+    
+    settings = config.get("settings", {})
+    video_formats = settings.get("supported_video_formats", ["mp4", "mov", "avi"])
+    uploaded_video = st.file_uploader("Pilih video", type=video_formats)
+    target_fps = st.number_input(
+        "Sampling FPS", min_value=0.5, max_value=30.0,
+        value=float(settings.get("video_target_fps", 5)), step=0.5
+    )
+    
+    render_video = st.checkbox("🎞️ Buat video beranotasi (MP4)", help="Frame yang di-sampling + huruf dan confidence")
+    
+    if uploaded_video and st.button("▶️ Proses Video"):
+        # cv2.VideoCapture butuh path, salin upload ke file sementara secara streaming
+        suffix = os.path.splitext(uploaded_video.name)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            shutil.copyfileobj(uploaded_video, tmp)
+            video_path = tmp.name
+        output_path = None
+        writer = None
+        
+        try:
+            props = VideoUtils.get_video_properties(video_path)
+            st.caption(f"{props['width']}x{props['height']} | {props['fps']:.4g} FPS | {props['duration']:.1f} detik")
+            
+            batch_size = config.get("performance", {}).get("batch_size", 1)
+            stride = VideoUtils.frame_stride(props['fps'], target_fps=target_fps)
+            # iter_frames mengambil frame 0, stride, 2*stride, ... (pembulatan ke atas)
+            expected = max(1, -(-props['frame_count'] // stride))
+            
+            progress = st.progress(0.0)
+            current = st.empty()
+            table = st.empty()
+            entries = []
+            if render_video:
+                # Annotate + encode + tulis ke file di thread encoder, loop inference tidak menunggu
+                with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
+                    output_path = tmp.name
+                writer = AsyncVideoWriter(output_path, props['fps'] / stride, threshold=confidence)
+            
+            for entry in iter_video_predictions(model, video_path, batch_size, target_fps=target_fps,
+                                                with_frames=writer is not None):
+                if writer is not None:
+                    writer.write(entry.pop("image"), entry["label"], entry["confidence"])
+                entries.append(entry)
+                if result_logger:
+                    result_logger.log_prediction(
+                        f"{uploaded_video.name}@{entry['time']}", [[entry["label"], entry["confidence"]]],
+                        source="video", frame=entry["frame"],
+                    )
+                # Update UI per batch, bukan per frame
+                if len(entries) % batch_size == 0:
+                    progress.progress(min(1.0, len(entries) / expected))
+                    current.markdown(f"### 🔤 **{entry['label']}** @ {entry['time']:.2f}s")
+                    table.dataframe(entries[-10:], use_container_width=True, hide_index=True)
+            
+            if writer is not None:
+                writer.close()
+            progress.progress(1.0)
+            current.empty()
+            table.empty()
+            
+            segments = merge_timeline(entries, confidence)
+            st.success(f"✓ {len(entries)} frame diproses")
+            st.markdown(f"### 📝 {''.join(seg['label'] for seg in segments) or '-'}")
+            st.dataframe(
+                [{
+                    "Mulai (s)": seg["start"],
+                    "Selesai (s)": seg["end"],
+                    "Abjad": seg["label"],
+                    "Frame": seg["frames"],
+                    "Confidence": f"{seg['confidence']*100:.1f}%",
+                } for seg in segments],
+                use_container_width=True, hide_index=True
+            )
+        
+            if output_path:
+                # Dibaca dari file, video tidak pernah dibangun di memory selama diproses
+                with open(output_path, "rb") as f:
+                    st.download_button(
+                        f"📥 Download video beranotasi ({writer.written} frame)", f,
+                        file_name=f"{os.path.splitext(uploaded_video.name)[0]}_annotated.mp4", mime="video/mp4"
+                    )
+        
+        except Exception as e:
+            st.error(f"❌ Error proses video: {str(e)}")
+        finally:
+            os.remove(video_path)
+            if writer is not None:
+                # Error di tengah loop: hentikan thread encoder sebelum file output dihapus
+                writer.close(raise_error=False)
+            if output_path:
+                os.remove(output_path)
+
+# ===== TAB 5: INFO =====
+with tab5:
     st.header("ℹ️ Informasi")
     
     col1, col2 = st.columns(2)
@@ -213,18 +498,22 @@ with tab4:
         st.markdown("""
         ### 📸 Fitur
         - **Upload Gambar**: Prediksi gambar dari komputer
+        - **Batch Upload**: Prediksi banyak gambar sekaligus (tabel hasil)
         - **Webcam**: Deteksi real-time dari kamera
-        - **Handphone**: Upload foto/video dari handphone
+        - **Handphone**: Deteksi real-time dari kamera handphone
+        - **Video**: Timeline abjad dari file video
         - **Adjustable**: Sesuaikan confidence threshold
         """)
     
     with col2:
-        st.markdown("""
+        framework = "TensorFlow Lite" if model.name == "tflite" else "PyTorch"
+        st.markdown(f"""
         ### 🤖 Model
         - **Type**: YOLOv8 Classification
-        - **File**: best.pt
-        - **Classes**: 26 Abjad (A-Z)
-        - **Framework**: PyTorch
+        - **File**: {os.path.basename(model.model_path)}
+        - **Classes**: {model.num_classes} Abjad (A-Z)
+        - **Framework**: {framework}
+        - **Input**: {model.imgsz}x{model.imgsz}
         - **Task**: BISINDO Sign Language Detection
         """)
     
@@ -240,3 +529,28 @@ with tab4:
 
 st.markdown("---")
 st.markdown("<center>Made with ❤️ | YOLO BISINDO v1.0</center>", unsafe_allow_html=True)
+
+# ===== SIDEBAR: LATENCY PER STAGE =====
+with latency_panel.container():
+    with st.expander("⏱️ Latency per Stage", expanded=False):
+        snapshot = METRICS.snapshot()
+        if snapshot:
+            st.dataframe(
+                [
+                    {
+                        "Stage": stage,
+                        "n": stats["count"],
+                        "p50 (ms)": round(stats["p50_ms"], 2),
+                        "p95 (ms)": round(stats["p95_ms"], 2),
+                        "p99 (ms)": round(stats["p99_ms"], 2),
+                    }
+                    for stage, stats in snapshot.items()
+                ],
+                use_container_width=True, hide_index=True,
+            )
+            st.download_button("📥 Prometheus metrics", METRICS.to_prometheus(), file_name="metrics.txt", mime="text/plain")
+        else:
+            st.caption("Belum ada request")
+        if result_logger:
+            log_stats = result_logger.stats()
+            st.caption(f"📝 Log: {log_stats['written']} tertulis, {log_stats['dropped']} di-drop, {log_stats['queued']} antre")